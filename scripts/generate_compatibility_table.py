@@ -4,6 +4,40 @@ Generate LaTeX compatibility table from JSON data
 import json
 import sys
 
+# 入力データに依存しない定型部分（毎回組み立て直さない）
+MATRIX_PREAMBLE = (
+    r"\begin{sidewaystable}[p]",
+    r"\centering",
+    r"\caption{車両・資源適合性マトリックス}",
+    r"\label{tab:compatibility}",
+)
+MATRIX_FOOTER_AND_LEGEND = (
+    r"\end{tabular}",
+    r"\end{sidewaystable}",
+    # Add legend (in normal orientation)
+    r"",
+    r"\vspace{0.5em}",
+    r"\noindent\textbf{凡例}：",
+    r"$\circ$: 適合、",
+    r"$\triangle$: 条件付き適合、",
+    r"$\times$: 不適合",
+    # Add requirements table for conditional compatibility (landscape)
+    r"",
+    r"\vspace{1em}",
+    r"\noindent\textbf{条件付き適合の詳細}：",
+    r"",
+    r"\begin{table}[H]",
+    r"\centering",
+    r"\caption{条件付き適合の要件}",
+    r"\begin{tabular}{|l|l|l|}",
+    r"\hline",
+    r"\textbf{車両} & \textbf{資源} & \textbf{必要条件} \\ \hline",
+)
+REQUIREMENTS_FOOTER = (
+    r"\end{tabular}",
+    r"\end{table}",
+)
+
 def generate_latex_table(json_path):
     with open(json_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
@@ -16,19 +50,14 @@ def generate_latex_table(json_path):
     vehicles = list(compatibility.keys())
 
     # Start LaTeX table with sidewaystable for landscape orientation
-    latex = []
-    latex.append(r"\begin{sidewaystable}[p]")
-    latex.append(r"\centering")
-    latex.append(r"\caption{車両・資源適合性マトリックス}")
-    latex.append(r"\label{tab:compatibility}")
+    latex = list(MATRIX_PREAMBLE)
     latex.append(r"\begin{tabular}{|l|" + "c|" * len(resources) + "}")
     latex.append(r"\hline")
 
     # Header row
-    header = r"\textbf{車両} & "
-    header += " & ".join([r"\rotatebox{90}{\textbf{" + res + r"}}" for res in resources])
-    header += r" \\ \hline"
-    latex.append(header)
+    latex.append(
+        r"\textbf{車両} & " + " & ".join(r"\rotatebox{90}{\textbf{" + res + r"}}" for res in resources) + r" \\ \hline"
+    )
 
     # Data rows
     for vehicle in vehicles:
@@ -52,28 +81,7 @@ def generate_latex_table(json_path):
 
         latex.append(" & ".join(row) + r" \\ \hline")
 
-    latex.append(r"\end{tabular}")
-    latex.append(r"\end{sidewaystable}")
-
-    # Add legend (in normal orientation)
-    latex.append(r"")
-    latex.append(r"\vspace{0.5em}")
-    latex.append(r"\noindent\textbf{凡例}：")
-    latex.append(r"$\circ$: 適合、")
-    latex.append(r"$\triangle$: 条件付き適合、")
-    latex.append(r"$\times$: 不適合")
-
-    # Add requirements table for conditional compatibility (landscape)
-    latex.append(r"")
-    latex.append(r"\vspace{1em}")
-    latex.append(r"\noindent\textbf{条件付き適合の詳細}：")
-    latex.append(r"")
-    latex.append(r"\begin{table}[H]")
-    latex.append(r"\centering")
-    latex.append(r"\caption{条件付き適合の要件}")
-    latex.append(r"\begin{tabular}{|l|l|l|}")
-    latex.append(r"\hline")
-    latex.append(r"\textbf{車両} & \textbf{資源} & \textbf{必要条件} \\ \hline")
+    latex.extend(MATRIX_FOOTER_AND_LEGEND)
 
     for vehicle in vehicles:
         for resource in resources:
@@ -81,8 +89,7 @@ def generate_latex_table(json_path):
             if req and req != "null" and compatibility[vehicle]['supports'][resource]:
                 latex.append(f"{vehicle} & {resource} & {req} " + r"\\ \hline")
 
-    latex.append(r"\end{tabular}")
-    latex.append(r"\end{table}")
+    latex.extend(REQUIREMENTS_FOOTER)
 
     return "\n".join(latex)
 
@@ -55,7 +55,9 @@ def generate_report(scenario: str, output_dir: Path) -> None:
 
     scenario_data = TEST_SCENARIOS[scenario]
 
-    report_content = f"""# eCOM-10 比較レポート
+    # 断片をリストに積み、最後に一度だけ連結する
+    parts: List[str] = [
+        f"""# eCOM-10 比較レポート
 
 **シナリオ**: {scenario_data['name']}
 **生成日時**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
@@ -64,9 +66,11 @@ def generate_report(scenario: str, output_dir: Path) -> None:
 
 ### 回収地点
 """
+    ]
+    append = parts.append
 
     for pickup in scenario_data["pickups"]:
-        report_content += f"- {pickup['id']}: {pickup['kind']} ({pickup['qty']}kg)\n"
+        append(f"- {pickup['id']}: {pickup['kind']} ({pickup['qty']}kg)\n")
 
     # eCOM-10互換性チェックのシミュレーション
     try:
@@ -80,40 +84,40 @@ def generate_report(scenario: str, output_dir: Path) -> None:
         # 互換性チェック
         compatibility = check_ecom10_compatibility(scenario_data["pickups"], master)
 
-        report_content += f"""
+        append(f"""
 ## 互換性チェック結果
 
 ### ✅ eCOM-10で運搬可能な資源
-"""
+""")
         if compatibility.compatible_pickups:
             for pickup in compatibility.compatible_pickups:
-                report_content += f"- {pickup.get('kind')}: {pickup.get('qty')}kg\n"
-            report_content += f"\n**総重量**: {compatibility.total_compatible_weight}kg\n"
+                append(f"- {pickup.get('kind')}: {pickup.get('qty')}kg\n")
+            append(f"\n**総重量**: {compatibility.total_compatible_weight}kg\n")
         else:
-            report_content += "なし\n"
+            append("なし\n")
 
-        report_content += f"""
+        append(f"""
 ### ❌ eCOM-10では運搬できない資源
-"""
+""")
         if compatibility.incompatible_pickups:
             for pickup in compatibility.incompatible_pickups:
-                report_content += f"- {pickup.get('kind')}: {pickup.get('qty')}kg\n"
+                append(f"- {pickup.get('kind')}: {pickup.get('qty')}kg\n")
         else:
-            report_content += "なし\n"
+            append("なし\n")
 
         if compatibility.warnings:
-            report_content += "\n### ⚠️ 警告メッセージ\n"
+            append("\n### ⚠️ 警告メッセージ\n")
             for warning in compatibility.warnings:
-                report_content += f"{warning}\n\n"
+                append(f"{warning}\n\n")
 
     except Exception as e:
-        report_content += f"""
+        append(f"""
 ## エラー
 
 互換性チェック中にエラーが発生しました: {str(e)}
-"""
+""")
 
-    report_content += """
+    append("""
 ## 比較結果
 
 ### 最適解（参考値）
@@ -141,11 +145,11 @@ def generate_report(scenario: str, output_dir: Path) -> None:
 
 ---
 *自動生成日時: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
-"""
+""")
 
     # レポート保存
     output_dir.mkdir(parents=True, exist_ok=True)
-    report_path.write_text(report_content, encoding="utf-8")
+    report_path.write_text("".join(parts), encoding="utf-8")
 
     print(f"✅ レポート生成完了: {report_path}")
 
@@ -160,7 +164,8 @@ def generate_summary(output_dir: Path, scenarios: List[str]) -> None:
     """
     summary_path = output_dir / "ecom10_comparison_summary.md"
 
-    summary_content = f"""# eCOM-10 比較分析サマリー
+    parts: List[str] = [
+        f"""# eCOM-10 比較分析サマリー
 
 **実行日時**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 **実行シナリオ数**: {len(scenarios)}
@@ -168,24 +173,26 @@ def generate_summary(output_dir: Path, scenarios: List[str]) -> None:
 ## 実行結果
 
 """
+    ]
+    append = parts.append
 
     for scenario in scenarios:
         scenario_data = TEST_SCENARIOS.get(scenario, {})
         scenario_name = scenario_data.get("name", scenario)
-        summary_content += f"### {scenario_name}\n"
-        summary_content += f"- シナリオ: `{scenario}`\n"
-        summary_content += f"- ステータス: ✅ 完了\n\n"
+        append(f"### {scenario_name}\n")
+        append(f"- シナリオ: `{scenario}`\n")
+        append(f"- ステータス: ✅ 完了\n\n")
 
-    summary_content += """
+    append("""
 ## 次のステップ
 
 詳細なレポートは Artifacts からダウンロードしてください。
 
 ---
 *自動生成レポート*
-"""
+""")
 
-    summary_path.write_text(summary_content, encoding="utf-8")
+    summary_path.write_text("".join(parts), encoding="utf-8")
     print(f"✅ サマリー生成完了: {summary_path}")
 
 
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import importlib.util
 import json
+import mmap
 import os
 import sys
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Container, Dict, List, Optional, Sequence, Tuple
 
 import streamlit as st  # type: ignore
 
@@ -34,6 +36,7 @@ from services import (
     PointRegistry,
     PointType,
     VehicleCatalog,
+    VehicleType,
     ResourceInfo,
     Solution,
     build_distance_matrix,
@@ -43,20 +46,47 @@ from services import (
     ProcessedMasterData,
     load_processed_master,
 )
+from services._compat import _DATACLASS_SLOTS
 from services.master_repository import VehicleCandidate
 from services.route_reconstruction import reconstruct_paths
 from services.spatial_index import SpatialIndex
 from services.cost_calculator import CostCalculator
-from services.ecom10_comparison import (
-    compute_ecom10_alternative,
-    find_alternative_vehicles,
-    eCOM10CompatibilityResult,
-)
 
-try:  # pandas is optional but improves the UI
-    import pandas as pd  # type: ignore
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from services.ecom10_comparison import eCOM10CompatibilityResult
+
+# pandas is optional but improves the UI. The import itself is deferred to the first
+# table render so that the initial page paint (notably under PyInstaller) stays fast.
+_PANDAS_AVAILABLE = importlib.util.find_spec("pandas") is not None
+pd = None  # type: ignore
+
+
+def _load_pandas():
+    """Import pandas on first use; returns ``None`` when it is not installed."""
+
+    global pd
+    if pd is None and _PANDAS_AVAILABLE:
+        import pandas as pandas_module  # type: ignore
+
+        pd = pandas_module
+    return pd
+
+try:  # NumPy is optional; enables vectorised nearest-node lookups
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    np = None  # type: ignore
+
+try:  # orjson is optional but parses bytes/memoryview without a str copy
+    import orjson  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover
-    pd = None  # type: ignore
+    orjson = None  # type: ignore
+
+try:  # 地図表示は folium / streamlit-folium がある場合のみ
+    import folium  # type: ignore
+    from streamlit_folium import st_folium  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    folium = None  # type: ignore
+    st_folium = None  # type: ignore
 
 
 DEFAULT_VEHICLE_RECORDS: List[Dict[str, float]] = [
@@ -77,9 +107,18 @@ ROLE_TO_COLOR = {
     "sink": "red",
 }
 
+# 役割ごとのマーカー基本スタイル: (塗り色, 半径)
+ROLE_MARKER_STYLE: Dict[str, Tuple[str, int]] = {
+    role: (color, 6 if role in {"depot", "sink"} else 5) for role, color in ROLE_TO_COLOR.items()
+}
+DEFAULT_MARKER_STYLE: Tuple[str, int] = ("gray", 5)
+HIGHLIGHT_BORDER_COLOR = "#FFD54F"
+
 
 PLANNING_COST_CALCULATOR = CostCalculator()
 DEFAULT_ESTIMATED_LEG_M = 1000.0
+# これを超えるネットワークJSONは mmap 経由で読み込む（utf-8 デコード済み str を作らない）
+NETWORK_JSON_MMAP_THRESHOLD_BYTES = 10 * 1024 * 1024
 
 
 @dataclass(frozen=True)
@@ -91,16 +130,62 @@ class SelectedPoint:
     label: str
 
 
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
+class NodeCoords:
+    """ノード座標を配列ごとに保持する（ノード毎の dict を作らない SoA 形式）。
+
+    NumPy がある場合 ``lats``/``lons`` は float64 配列、無い場合は list。
+    """
+
+    ids: List[str]
+    lats: Sequence[float]
+    lons: Sequence[float]
+    names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def _from_lists(cls, ids: List[str], lats: List[float], lons: List[float], names: List[str]) -> "NodeCoords":
+        if np is not None:
+            return cls(ids, np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64), names)
+        return cls(ids, lats, lons, names)
+
+    def as_dicts(self) -> List[Dict[str, object]]:
+        """旧来の ``[{"id", "lat", "lon", "name"}, ...]`` 形式が必要な呼び出し向け。"""
+        return [
+            {"id": node_id, "lat": float(lat), "lon": float(lon), "name": name}
+            for node_id, lat, lon, name in zip(self.ids, self.lats, self.lons, self.names)
+        ]
+
+
+@st.cache_data(show_spinner=False, ttl=30)
 def _list_network_files() -> Dict[str, Path]:
     data_dir = _get_data_dir()
     files = sorted(data_dir.glob("road_network_*.json"))
     return {file.name: file for file in files}
 
 
-@st.cache_resource(show_spinner=False)
+def _read_network_json(path: Path) -> Dict[str, object]:
+    if orjson is not None and path.stat().st_size > NETWORK_JSON_MMAP_THRESHOLD_BYTES:
+        with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return orjson.loads(view)
+    raw = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def load_graph(json_path: str):
+    # ファイルが更新された場合だけ読み直す（キャッシュキーに mtime を含める）
+    return _load_graph_cached(json_path, os.stat(json_path).st_mtime_ns)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_graph_cached(json_path: str, mtime_ns: int):
     path = Path(json_path)
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = _read_network_json(path)
     graph = nx.DiGraph()
     for node_id, node in data.get("nodes", {}).items():
         graph.add_node(node_id, lat=node.get("lat"), lon=node.get("lon"), name=node.get("name"))
@@ -112,13 +197,21 @@ def load_graph(json_path: str):
 
 
 @st.cache_data(show_spinner=False)
-def cached_distance_matrix(json_path: str, node_ids: Tuple[str, ...]):
+def _cached_distance_matrix_sorted(json_path: str, mtime_ns: int, sorted_ids: Tuple[str, ...]):
     graph, _ = load_graph(json_path)
-    points = [{"id": node_id, "osmid": node_id} for node_id in node_ids]
+    points = [{"id": node_id, "osmid": node_id} for node_id in sorted_ids]
     return build_distance_matrix(graph, points)
 
 
-@st.cache_resource(show_spinner=False)
+def cached_distance_matrix(json_path: str, node_ids: Sequence[str]):
+    # 並び順だけが異なる地点集合は同じキャッシュを共有する。
+    # DistanceMatrix は index_map 経由で参照されるため、行列の並べ替えは不要。
+    mtime_ns = os.stat(json_path).st_mtime_ns
+    return _cached_distance_matrix_sorted(json_path, mtime_ns, tuple(sorted(set(node_ids))))
+
+
+# load_processed_master 自体が JSON の mtime をキーにキャッシュするため、
+# ここで st.cache_resource を重ねると更新後も古いマスタを返し続ける
 def load_processed_master_cached() -> Optional[ProcessedMasterData]:
     processed_dir = _get_data_dir() / "processed"
     if not processed_dir.exists():
@@ -207,8 +300,7 @@ def _init_session_state(master: Optional[ProcessedMasterData]) -> None:
     st.session_state.setdefault("depot_id", None)
     st.session_state.setdefault("sink_id", None)
     st.session_state.setdefault("pickup_selection", [])
-    st.session_state.setdefault("node_coords_cache", {})
-    st.session_state.setdefault("spatial_index_cache", {})
+    st.session_state.setdefault("active_coords_entry", None)
     st.session_state.setdefault("last_click_token", None)
     st.session_state.setdefault("last_selected_node", None)
     st.session_state.setdefault("last_selected_role", None)
@@ -326,6 +418,53 @@ def _process_pickup_dialog_result() -> None:
     st.session_state["pickup_dialog_result"] = None
 
 
+def _queue_pickup_edit(action: str, point_id: Optional[str] = None) -> None:
+    """ボタンのコールバック。編集内容をキューに積み、次の実行冒頭でまとめて反映する。"""
+    edit: Dict[str, object] = {"action": action, "point_id": point_id}
+    if action == "update" and point_id is not None:
+        edit["resource"] = st.session_state.get(f"edit_resource_{point_id}")
+        edit["qty"] = st.session_state.get(f"edit_qty_{point_id}", 0)
+    st.session_state.setdefault("_pending_edits", []).append(edit)
+
+
+def _apply_pending_pickup_edits() -> None:
+    edits = st.session_state.get("_pending_edits")
+    if not edits:
+        return
+    st.session_state["_pending_edits"] = []
+
+    pickups: List[str] = list(st.session_state.get("pickup_selection", []))
+    attrs_dict: Dict[str, Dict[str, object]] = dict(st.session_state.get("pickup_attrs", {}))
+    removed: set[str] = set()
+    message = ""
+    for edit in edits:
+        action = edit.get("action")
+        point_id = edit.get("point_id")
+        if action == "clear_all":
+            pickups = []
+            attrs_dict = {}
+            removed.clear()
+            _clear_pending_pickup()
+            if st.session_state.get("last_selected_role") == "pickup":
+                _set_last_selection(None, None)
+            message = "🗑️ すべての回収地点を削除しました"
+        elif action == "update" and point_id:
+            resource = edit.get("resource")
+            attrs_dict[point_id] = {"qty": int(edit.get("qty") or 0), "kind": resource, "resource": resource}
+            message = f"✅ {point_id} を更新しました"
+        elif action == "delete" and point_id:
+            removed.add(point_id)
+            attrs_dict.pop(point_id, None)
+            message = f"🗑️ {point_id} を削除しました"
+
+    if removed:
+        pickups = [pickup_id for pickup_id in pickups if pickup_id not in removed]
+    st.session_state["pickup_selection"] = pickups
+    st.session_state["pickup_attrs"] = attrs_dict
+    if message:
+        _set_map_feedback("success", message)
+
+
 def _prepare_pending_defaults(
     node_id: str,
     master: Optional[ProcessedMasterData],
@@ -360,24 +499,30 @@ def _finalise_pending_pickup(node_id: str, resource: str, qty: int) -> str:
     return node_id
 
 
-def _ensure_selection_defaults(node_ids: List[str]) -> None:
+def _ensure_selection_defaults(
+    node_ids: List[str],
+    known_ids: Optional[Container[str]] = None,
+) -> None:
     if not node_ids:
         return
+    # known_ids にはキャッシュ済みの id->index 辞書などを渡し、O(1) で所属判定する
+    if known_ids is None:
+        known_ids = set(node_ids)
     depot_id = st.session_state.get("depot_id")
-    if depot_id not in node_ids:
+    if depot_id not in known_ids:
         preferred = _find_closest_node(node_ids, target_lat=36.42025757338635, target_lon=139.3464551140531)
         st.session_state["depot_id"] = preferred or node_ids[0]
-    if st.session_state.get("sink_id") not in node_ids:
+    if st.session_state.get("sink_id") not in known_ids:
         preferred = _find_closest_node(node_ids, target_lat=36.424856512788374, target_lon=139.34618718561728)
         st.session_state["sink_id"] = preferred or (node_ids[1] if len(node_ids) > 1 else node_ids[0])
-    pickups = [node for node in st.session_state.get("pickup_selection", []) if node in node_ids]
+    pickups = [node for node in st.session_state.get("pickup_selection", []) if node in known_ids]
     st.session_state["pickup_selection"] = pickups
 
 
 def _render_vehicle_editor(master: Optional[ProcessedMasterData]) -> None:
     st.subheader("車種候補")
     vehicles = st.session_state["vehicles"]
-    if pd is not None:
+    if _load_pandas() is not None:
         df = pd.DataFrame(vehicles)
         edited = st.data_editor(
             df,
@@ -467,7 +612,8 @@ def _collect_pickup_inputs(
     selected_pickups: List[str],
     master: Optional[ProcessedMasterData],
 ) -> List[Dict[str, object]]:
-    attrs = st.session_state["pickup_attrs"]
+    # SessionStateProxy へのアクセスはループ外で1回ずつに抑え、ローカル dict を更新してから書き戻す
+    attrs: Dict[str, Dict[str, object]] = dict(st.session_state.get("pickup_attrs", {}))
     results: List[Dict[str, object]] = []
     required_resources: set[str] = set()
     resources = master.resources if master else {}
@@ -536,21 +682,40 @@ def _collect_pickup_inputs(
             )
             attrs[point_id] = {"qty": int(qty), "kind": kind}
             results.append({"id": point_id, "qty": int(qty), "kind": kind})
-    for point_id in list(attrs.keys()):
-        if point_id not in selected_pickups:
-            attrs.pop(point_id)
+    selected_set = set(selected_pickups)
+    st.session_state["pickup_attrs"] = {
+        point_id: record for point_id, record in attrs.items() if point_id in selected_set
+    }
     st.session_state["required_resources"] = sorted(required_resources)
     return results
 
 
+def _vehicle_catalog_key(records: Sequence[Dict[str, object]]) -> Tuple[Tuple[object, ...], ...]:
+    return tuple(
+        (
+            record.get("name"),
+            record.get("capacity_kg"),
+            record.get("fixed_cost"),
+            record.get("per_km_cost"),
+            record.get("fixed_cost_per_km"),
+            record.get("energy_consumption_kwh_per_km"),
+        )
+        for record in records
+    )
+
+
 def _build_vehicle_catalog(records: List[Dict[str, object]]) -> VehicleCatalog:
+    st.session_state["vehicle_requirements"] = {}
+    # 車種表が前回と同じなら構築済みのカタログを再利用する（カタログは読み取り専用で使う）
+    key = _vehicle_catalog_key(records)
+    cached = st.session_state.get("_vehicle_catalog_cache")
+    if cached is not None and cached[0] == key:
+        return cached[1]
     catalog = VehicleCatalog()
-    metadata = st.session_state.get("vehicle_metadata", {})
     for record in records:
         name = str(record.get("name") or "").strip()
         if not name:
             continue
-        meta = metadata.get(name, {}) if isinstance(metadata, dict) else {}
         catalog.add_vehicle(
             name=name,
             capacity=int(record.get("capacity_kg", 0)),
@@ -559,7 +724,7 @@ def _build_vehicle_catalog(records: List[Dict[str, object]]) -> VehicleCatalog:
             fixed_cost_per_km=float(record.get("fixed_cost_per_km", 0.0) or 0.0),
             energy_consumption_kwh_per_km=float(record.get("energy_consumption_kwh_per_km", 0.0) or 0.0),
         )
-    st.session_state["vehicle_requirements"] = {}
+    st.session_state["_vehicle_catalog_cache"] = (key, catalog)
     return catalog
 
 
@@ -655,9 +820,7 @@ def _vehicle_supports_resource(
     return False
 
 
-def _make_vehicle_type(record: Dict[str, object]) -> "VehicleType":
-    from services.vehicle_catalog import VehicleType  # local import to avoid circular type hints
-
+def _make_vehicle_type(record: Dict[str, object]) -> VehicleType:
     name = str(record.get("name") or "").strip()
     capacity = int(record.get("capacity_kg", 0) or 0)
     fixed_cost = float(record.get("fixed_cost", 0.0) or 0.0)
@@ -695,43 +858,55 @@ def _vehicle_candidate_to_dict(candidate: "VehicleCandidate") -> Dict[str, objec
     }
 
 
-def _calculate_total_demand(pickup_inputs: Sequence[Dict[str, object]]) -> int:
-    total_kg = 0
-    for pickup in pickup_inputs:
-        qty = pickup.get("qty", 0)
-        try:
-            qty_value = int(qty or 0)
-        except (TypeError, ValueError):
-            qty_value = 0
-        if qty_value <= 0:
-            continue
-        total_kg += qty_value
-    return max(0, total_kg)
+def _split_ecom10_vehicle_types(master: ProcessedMasterData) -> Tuple[Optional[VehicleType], List[VehicleType]]:
+    """マスタ車両を VehicleType に変換し、eCOM-10 とそれ以外に分ける。"""
+    ecom10_vehicle: Optional[VehicleType] = None
+    other_vehicles: List[VehicleType] = []
+    for candidate in master.vehicles:
+        vehicle_type = _make_vehicle_type(_vehicle_candidate_to_dict(candidate))
+        if candidate.name == "eCOM-10":
+            ecom10_vehicle = vehicle_type
+        else:
+            other_vehicles.append(vehicle_type)
+    return ecom10_vehicle, other_vehicles
 
 
-def _extract_required_resources(pickup_inputs: Sequence[Dict[str, object]]) -> List[str]:
-    resources: set[str] = set()
-    for pickup in pickup_inputs:
-        kind = pickup.get("kind")
-        if not kind:
-            continue
-        resources.add(str(kind))
-    return sorted(resources)
+@dataclass(frozen=True)
+class PickupSummary:
+    """Per-resource aggregates derived from ``pickup_inputs`` in a single pass."""
+
+    resource_groups: Dict[str, List[Dict[str, object]]]
+    resource_totals: Dict[str, int]
 
 
-def _group_pickups_by_resource(
-    pickup_inputs: Sequence[Dict[str, object]]
-) -> Dict[str, List[Dict[str, object]]]:
-    """ピックアップを資源種別ごとにグループ化"""
+def _pickup_qty(pickup: Dict[str, object]) -> int:
+    try:
+        qty_value = int(pickup.get("qty", 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+    return qty_value if qty_value > 0 else 0
+
+
+def _summarize_pickups(pickup_inputs: Sequence[Dict[str, object]]) -> PickupSummary:
+    """資源別グループと資源別総重量を1回の走査で求める"""
     groups: Dict[str, List[Dict[str, object]]] = {}
+    totals: Dict[str, int] = {}
     for pickup in pickup_inputs:
+        # グループ化は従来どおり str(kind) で行う（kind=None は "None" グループに入る）
         resource = str(pickup.get("kind", ""))
         if not resource:
             continue
-        if resource not in groups:
-            groups[resource] = []
-        groups[resource].append(pickup)
-    return groups
+        group = groups.get(resource)
+        if group is None:
+            groups[resource] = group = []
+            totals[resource] = 0
+        group.append(pickup)
+        totals[resource] += _pickup_qty(pickup)
+    return PickupSummary(resource_groups=groups, resource_totals=totals)
+
+
+def _calculate_total_demand(pickup_inputs: Sequence[Dict[str, object]]) -> int:
+    return sum(_pickup_qty(pickup) for pickup in pickup_inputs)
 
 
 def _select_vehicle_for_resource(
@@ -741,9 +916,11 @@ def _select_vehicle_for_resource(
     master: Optional[ProcessedMasterData],
     distance_m: float,
     metadata_lookup: Dict[str, VehicleCandidate],
+    total_demand: Optional[int] = None,
 ) -> Optional[Dict[str, object]]:
     """特定資源種別に対応する最適車両を選択"""
-    total_demand = _calculate_total_demand(pickups)
+    if total_demand is None:
+        total_demand = _calculate_total_demand(pickups)
 
     # この資源をサポートする車両のみフィルタ
     compatible = [
@@ -853,8 +1030,9 @@ def _plan_vehicle_allocations(
     if not pickup_inputs:
         return [], []
 
-    # 資源種別でグループ化
-    resource_groups = _group_pickups_by_resource(pickup_inputs)
+    # 資源種別でグループ化（総重量も同じ走査で集計）
+    summary = _summarize_pickups(pickup_inputs)
+    resource_groups = summary.resource_groups
 
     if not resource_groups:
         return [], ["資源種別が指定されていません。"]
@@ -883,10 +1061,11 @@ def _plan_vehicle_allocations(
             master,
             distance_m,
             metadata_lookup,
+            total_demand=summary.resource_totals[resource],
         )
 
         if vehicle is None:
-            total_demand = _calculate_total_demand(pickups)
+            total_demand = summary.resource_totals[resource]
 
             # この資源をサポートする車両を探す
             compatible = [
@@ -952,58 +1131,90 @@ def _build_point_registry(graph, depot: str, sink: str, pickups: List[Dict[str,
     return registry
 
 
-def _extract_node_coordinates(graph) -> List[Dict[str, object]]:
-    coords: List[Dict[str, object]] = []
-    for node_id, data in _iter_nodes(graph):
+def _extract_node_coordinates(graph) -> NodeCoords:
+    ids: List[str] = []
+    lats: List[float] = []
+    lons: List[float] = []
+    names: List[str] = []
+    # NetworkX のグラフは内部の _node 辞書を直接走査し、NodeDataView を経由しない
+    node_items = graph._node.items() if hasattr(graph, "_node") else _iter_nodes(graph)
+    for node_id, data in node_items:
         lat = data.get("lat")
         lon = data.get("lon")
         if lat is None or lon is None:
             continue
-        coords.append(
-            {
-                "id": node_id,
-                "lat": float(lat),
-                "lon": float(lon),
-                "name": data.get("name") or node_id,
-            }
-        )
-    return coords
+        node_key = sys.intern(str(node_id))
+        ids.append(node_key)
+        lats.append(float(lat))
+        lons.append(float(lon))
+        names.append(str(data.get("name") or node_key))
+    return NodeCoords._from_lists(ids, lats, lons, names)
 
 
-def _build_node_lookup(node_coords: List[Dict[str, object]]) -> Dict[str, Dict[str, object]]:
-    lookup: Dict[str, Dict[str, object]] = {}
-    for entry in node_coords:
-        node_id = str(entry.get("id") or entry.get("node_id"))
-        if not node_id:
-            continue
-        lookup[node_id] = entry
-    return lookup
+def _build_node_lookup(node_coords: NodeCoords) -> Dict[str, int]:
+    """ノードID -> ``NodeCoords`` の配列インデックス。"""
+    return {node_id: idx for idx, node_id in enumerate(node_coords.ids)}
+
 
+def _make_coords_cache_entry(node_coords: NodeCoords) -> Dict[str, object]:
+    return {"coords": node_coords, "lookup": _build_node_lookup(node_coords)}
 
-def _find_closest_node(node_ids: List[str], target_lat: float, target_lon: float) -> Optional[str]:
-    coords_cache: Dict[str, Dict[str, object]] = st.session_state.get("node_coords_cache", {})
-    lookup: Optional[Dict[str, Dict[str, object]]] = None
-    for entry in coords_cache.values():
-        if isinstance(entry, dict) and "lookup" in entry:
-            lookup = entry["lookup"]  # type: ignore[assignment]
-            break
-        if isinstance(entry, list):  # backward compatibility
-            lookup = _build_node_lookup(entry)
-            break
-    if lookup is None:
+
+def _count_edges(graph) -> int:
+    try:
+        return graph.number_of_edges()  # type: ignore[attr-defined]
+    except AttributeError:
+        return sum(len(neighbours) for neighbours in getattr(graph, "_succ", {}).values())
+
+
+def _get_graph_artifacts(json_path: str) -> Dict[str, object]:
+    return _load_graph_artifacts(json_path, os.stat(json_path).st_mtime_ns)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_graph_artifacts(json_path: str, mtime_ns: int) -> Dict[str, object]:
+    """座標配列・id 索引・SpatialIndex をセッション間で共有する（読み取り専用として扱う）。"""
+    graph, metadata = _load_graph_cached(json_path, mtime_ns)
+    node_coords = _extract_node_coordinates(graph)
+    entry = _make_coords_cache_entry(node_coords)
+    entry["graph_key"] = (json_path, mtime_ns)
+    # サイドバー表示用の件数もここで一度だけ求める
+    entry["node_count"] = metadata["node_count"] if "node_count" in metadata else len(graph.nodes)
+    entry["edge_count"] = metadata["edge_count"] if "edge_count" in metadata else _count_edges(graph)
+    entry["index"] = (
+        SpatialIndex.from_arrays(node_coords.ids, node_coords.lats, node_coords.lons) if len(node_coords) else None
+    )
+    return entry
+
+
+def _find_closest_node(
+    node_ids: List[str],
+    target_lat: float,
+    target_lon: float,
+) -> Optional[str]:
+    # main() で選択中ネットワークのエントリを登録済み
+    cache_entry: Optional[Dict[str, object]] = st.session_state.get("active_coords_entry")
+    if not cache_entry:
         return node_ids[0] if node_ids else None
+    coords: NodeCoords = cache_entry["coords"]  # type: ignore[assignment]
+    index_of: Dict[str, int] = cache_entry["lookup"]  # type: ignore[assignment]
+
+    index: Optional[SpatialIndex] = cache_entry.get("index")  # type: ignore[assignment]
+    if index is not None and node_ids:
+        # 全ノードが候補なら絞り込み無しで Morton 探索を使う
+        allowed = None if node_ids is coords.ids else set(node_ids)
+        try:
+            return index.nearest(target_lat, target_lon, allowed_ids=allowed).node_id
+        except ValueError:
+            pass
 
     best_id: Optional[str] = None
     best_distance = float("inf")
     for node_id in node_ids:
-        coord = lookup.get(node_id)
-        if not coord:
-            continue
-        lat = coord.get("lat")
-        lon = coord.get("lon")
-        if lat is None or lon is None:
+        pos = index_of.get(node_id)
+        if pos is None:
             continue
-        distance = (float(lat) - target_lat) ** 2 + (float(lon) - target_lon) ** 2
+        distance = _haversine_distance(target_lat, target_lon, float(coords.lats[pos]), float(coords.lons[pos]))
         if distance < best_distance:
             best_distance = distance
             best_id = node_id
@@ -1014,58 +1225,49 @@ def _collect_selected_points(
     depot_id: Optional[str],
     sink_id: Optional[str],
     pickup_ids: Sequence[str],
-    node_lookup: Dict[str, Dict[str, object]],
+    node_coords: NodeCoords,
+    node_lookup: Dict[str, int],
 ) -> List[SelectedPoint]:
-    def _build_point(node_id: Optional[str], role: str) -> Optional[SelectedPoint]:
-        if not node_id:
-            return None
-        entry = node_lookup.get(node_id)
-        if entry is None:
-            st.warning(f"ノード '{node_id}' の座標情報が見つかりません。")
-            return None
-        lat = entry.get("lat")
-        lon = entry.get("lon")
-        if lat is None or lon is None:
-            st.warning(f"ノード '{node_id}' に緯度経度情報がありません。")
-            return None
-        label = str(entry.get("name") or node_id)
-        return SelectedPoint(node_id=node_id, lat=float(lat), lon=float(lon), role=role, label=label)
-
-    points: List[SelectedPoint] = []
-    seen: set[str] = set()
-
     candidates = [(depot_id, "depot")] + [(pid, "pickup") for pid in pickup_ids] + [(sink_id, "sink")]
 
-    for candidate, role in candidates:
-        point = _build_point(candidate, role)
-        if point is None:
+    positions: List[Tuple[str, int, str]] = []
+    missing: Dict[str, None] = {}
+    seen: set[str] = set()
+    for node_id, role in candidates:
+        if not node_id or node_id in seen:
             continue
-        if point.node_id in seen:
+        pos = node_lookup.get(node_id)
+        if pos is None:
+            missing.setdefault(node_id)
             continue
-        points.append(point)
-        seen.add(point.node_id)
+        seen.add(node_id)
+        positions.append((node_id, pos, role))
+
+    lats, lons, names = node_coords.lats, node_coords.lons, node_coords.names
+    points = [
+        SelectedPoint(node_id=node_id, lat=float(lats[pos]), lon=float(lons[pos]), role=role, label=names[pos] or node_id)
+        for node_id, pos, role in positions
+    ]
+    for node_id in missing:
+        st.warning(f"ノード '{node_id}' の座標情報が見つかりません。")
     return points
 
 
+SelectedPointLookup = Dict[Tuple[str, str], SelectedPoint]
+
+
+def _build_selected_point_lookup(points: Sequence[SelectedPoint]) -> SelectedPointLookup:
+    return {(point.node_id, point.role): point for point in points}
+
+
 def _find_selected_point(
-    points: Sequence[SelectedPoint],
+    lookup: SelectedPointLookup,
     node_id: Optional[str],
     role: Optional[str],
 ) -> Optional[SelectedPoint]:
     if not node_id or not role:
         return None
-    for point in points:
-        if point.node_id == node_id and point.role == role:
-            return point
-    return None
-def _get_spatial_index(network_key: str, node_coords: List[Dict[str, object]]) -> SpatialIndex:
-    cache: Dict[str, SpatialIndex] = st.session_state.get("spatial_index_cache", {})
-    index = cache.get(network_key)
-    if index is None or index.node_count != len(node_coords):
-        index = SpatialIndex.from_iterable(node_coords)
-        cache[network_key] = index
-        st.session_state["spatial_index_cache"] = cache
-    return index
+    return lookup.get((node_id, role))
 
 
 def _iter_nodes(graph):
@@ -1074,16 +1276,53 @@ def _iter_nodes(graph):
     return graph.nodes.items()  # type: ignore[attr-defined]
 
 
+def _build_network_map(
+    points: Tuple[Tuple[str, float, float, str, str], ...],
+    center: Tuple[float, float],
+    mode_role: Optional[str],
+    highlight_key: Optional[Tuple[str, str]],
+):
+    fmap = folium.Map(location=list(center), zoom_start=13)
+
+    markers: List[Dict[str, object]] = []
+    for node_id, lat, lon, role, label in points:
+        base_color, radius = ROLE_MARKER_STYLE.get(role, DEFAULT_MARKER_STYLE)
+        fill_opacity = 0.9
+        border_color = base_color
+        border_weight = 2
+
+        if role == mode_role:
+            radius += 1
+            fill_opacity = 1.0
+
+        if highlight_key is not None and (node_id, role) == highlight_key:
+            border_color = HIGHLIGHT_BORDER_COLOR
+            border_weight = 3
+            radius += 2
+
+        markers.append(
+            {
+                "lat": lat,
+                "lon": lon,
+                "radius": radius,
+                "color": border_color,
+                "weight": border_weight,
+                "fillColor": base_color,
+                "fillOpacity": fill_opacity,
+                "popup": label,
+            }
+        )
+    _add_circle_markers(fmap, markers)
+    return fmap
+
+
 def _render_network_map(
-    node_coords: List[Dict[str, object]],
+    node_coords: NodeCoords,
     selected_points: Sequence[SelectedPoint],
     mode: str,
     last_feedback: Optional[SelectedPoint],
 ):
-    try:
-        import folium  # type: ignore
-        from streamlit_folium import st_folium  # type: ignore
-    except ModuleNotFoundError:
+    if folium is None or st_folium is None:
         st.info("地図表示にはfoliumとstreamlit-foliumが必要です。")
         return None
 
@@ -1091,42 +1330,19 @@ def _render_network_map(
         center_lat, center_lon = last_feedback.lat, last_feedback.lon
     elif selected_points:
         center_lat, center_lon = selected_points[0].lat, selected_points[0].lon
-    elif node_coords:
-        center_lat = float(node_coords[0]["lat"])
-        center_lon = float(node_coords[0]["lon"])
+    elif len(node_coords):
+        center_lat = float(node_coords.lats[0])
+        center_lon = float(node_coords.lons[0])
     else:
         st.warning("ノードに座標情報がありません。")
         return None
 
-    fmap = folium.Map(location=[center_lat, center_lon], zoom_start=13)
-    mode_role = MODE_TO_ROLE.get(mode)
-
-    for point in selected_points:
-        base_color = ROLE_TO_COLOR.get(point.role, "gray")
-        radius = 6 if point.role in {"depot", "sink"} else 5
-        fill_opacity = 0.9
-        border_color = base_color
-        border_weight = 2
-
-        if point.role == mode_role:
-            radius += 1
-            fill_opacity = 1.0
-
-        if last_feedback and point.node_id == last_feedback.node_id and point.role == last_feedback.role:
-            border_color = "#FFD54F"
-            border_weight = 3
-            radius += 2
-
-        folium.CircleMarker(
-            location=[point.lat, point.lon],
-            radius=radius,
-            color=border_color,
-            weight=border_weight,
-            fill=True,
-            fill_color=base_color,
-            fill_opacity=fill_opacity,
-            popup=point.label,
-        ).add_to(fmap)
+    fmap = _build_network_map(
+        tuple((p.node_id, p.lat, p.lon, p.role, p.label) for p in selected_points),
+        (float(center_lat), float(center_lon)),
+        MODE_TO_ROLE.get(mode),
+        (last_feedback.node_id, last_feedback.role) if last_feedback else None,
+    )
 
     st.write(f"クリックモード: **{mode}**")
     st.caption("凡例: 緑=車庫 / 青=回収 / 赤=集積 / 黄色枠=最新の更新")
@@ -1271,15 +1487,24 @@ def _get_vehicle_metadata(vehicle_name: str) -> Optional[VehicleCandidate]:
     Returns:
         VehicleCandidate または None（見つからない場合）
     """
-    processed_master = st.session_state.get("processed_master")
-    if not processed_master or not processed_master.vehicles:
-        return None
+    return st.session_state.get("vehicle_by_name", {}).get(vehicle_name)
 
-    for candidate in processed_master.vehicles:
-        if candidate.name == vehicle_name:
-            return candidate
 
-    return None
+def _refresh_vehicle_index(processed_master: Optional[ProcessedMasterData]) -> None:
+    """車両名 -> VehicleCandidate の辞書群を processed_master が変わった時だけ作り直す。"""
+    if (
+        st.session_state.get("vehicle_by_name_source") is processed_master
+        and "vehicle_by_name" in st.session_state
+        and "vehicle_metadata_map" in st.session_state
+    ):
+        return
+    index: Dict[str, VehicleCandidate] = {}
+    if processed_master and processed_master.vehicles:
+        for candidate in processed_master.vehicles:
+            index.setdefault(candidate.name, candidate)  # 同名があれば先頭を優先（従来の線形探索と同じ）
+    st.session_state["vehicle_by_name"] = index
+    st.session_state["vehicle_metadata_map"] = _build_vehicle_candidate_lookup(processed_master)
+    st.session_state["vehicle_by_name_source"] = processed_master
 
 
 def _extract_variable_costs(
@@ -1446,7 +1671,7 @@ def _display_unified_cost_comparison(
     ]
 
     # DataFrame表示
-    if pd is not None:
+    if _load_pandas() is not None:
         df = pd.DataFrame(rows)
         st.dataframe(df, use_container_width=True, hide_index=True)
     else:
@@ -1573,7 +1798,7 @@ def _display_unified_detailed_cost_comparison(
     })
 
     # DataFrame表示
-    if pd is not None:
+    if _load_pandas() is not None:
         df = pd.DataFrame(rows)
         # カラム名を整形（マルチインデックス風）
         st.markdown("**表示形式**: 最適解 | eCOM-10")
@@ -1583,6 +1808,27 @@ def _display_unified_detailed_cost_comparison(
         st.write(rows)
 
 
+def _render_cost_items_table(items: Sequence[Tuple[str, str, float]]) -> None:
+    """(費用項目, 単価, 金額) の一覧を表として表示する。"""
+    if _load_pandas() is not None:
+        names, units, costs = zip(*items)
+        df = pd.DataFrame(
+            {
+                "費用項目": pd.Series(names, dtype=object).str.strip(),
+                "単価": units,
+                "金額 (円)": pd.Series(costs, dtype=float).astype(int),
+            }
+        )
+        st.dataframe(df.style.format({"金額 (円)": "{:,}"}), use_container_width=True, hide_index=True)
+    else:  # pragma: no cover
+        st.write(
+            [
+                {"費用項目": item_name.strip(), "単価": unit_str, "金額 (円)": f"{int(cost):,}"}
+                for item_name, unit_str, cost in items
+            ]
+        )
+
+
 def _display_variable_cost_table(
     cost_breakdown: Dict[str, float],
     vehicle_name: str,
@@ -1610,21 +1856,7 @@ def _display_variable_cost_table(
         st.info("変動費の詳細データがありません")
         return
 
-    # テーブル作成
-    rows = []
-    for item_name, unit_str, cost in variable_items:
-        rows.append({
-            "費用項目": item_name.strip(),
-            "単価": unit_str,
-            "金額 (円)": f"{int(cost):,}",
-        })
-
-    # DataFrameで表示
-    if pd is not None:
-        df = pd.DataFrame(rows)
-        st.dataframe(df, use_container_width=True, hide_index=True)
-    else:  # pragma: no cover
-        st.write(rows)
+    _render_cost_items_table(variable_items)
 
     # 合計表示
     total_variable = cost_breakdown.get("distance_cost", 0)
@@ -1644,21 +1876,7 @@ def _display_fixed_cost_table(
         st.info("固定費の詳細データがありません")
         return
 
-    # テーブル作成
-    rows = []
-    for item_name, unit_str, cost in fixed_items:
-        rows.append({
-            "費用項目": item_name.strip(),
-            "単価": unit_str,
-            "金額 (円)": f"{int(cost):,}",
-        })
-
-    # DataFrameで表示
-    if pd is not None:
-        df = pd.DataFrame(rows)
-        st.dataframe(df, use_container_width=True, hide_index=True)
-    else:  # pragma: no cover
-        st.write(rows)
+    _render_cost_items_table(fixed_items)
 
     # 合計表示
     total_fixed = cost_breakdown.get("fixed_cost", 0)
@@ -1731,36 +1949,104 @@ def _display_detailed_cost_breakdown(
     _display_fixed_cost_table(cost_breakdown, vehicle_name, distance_km)
 
 
-def _display_route_map_only(graph, solution: Solution) -> None:
-    """
-    ルートの地図のみを表示する。
+# これ以上のマーカー数では CircleMarker を個別に追加せず単一の GeoJson レイヤにまとめる
+GEOJSON_MARKER_MIN_POINTS = 20
 
-    Args:
-        graph: グラフオブジェクト
-        solution: ルート解
+
+def _geojson_marker_style(feature: Dict[str, object]) -> Dict[str, object]:
+    return feature["properties"]["style"]  # type: ignore[index]
+
+
+def _add_circle_markers(fmap, markers: Sequence[Dict[str, object]]) -> None:
+    """CircleMarker 群を地図に追加する。
+
+    ``markers`` の各要素は ``lat``/``lon``/``popup`` と Leaflet のスタイル
+    (``radius``, ``color``, ``weight``, ``fillColor``, ``fillOpacity``) を持つ dict。
     """
-    try:
-        import folium  # type: ignore
-        from streamlit_folium import st_folium  # type: ignore
-    except ModuleNotFoundError:  # pragma: no cover
-        st.info("地図表示にはfoliumとstreamlit-foliumが必要です。")
+    if len(markers) < GEOJSON_MARKER_MIN_POINTS:
+        # 少数でも個々の地図要素にせず1つの FeatureGroup レイヤにまとめる
+        group = folium.FeatureGroup(control=False)
+        for marker in markers:
+            folium.CircleMarker(
+                location=[marker["lat"], marker["lon"]],
+                radius=marker["radius"],
+                color=marker["color"],
+                weight=marker["weight"],
+                fill=True,
+                fill_color=marker["fillColor"],
+                fill_opacity=marker["fillOpacity"],
+                popup=marker["popup"],
+            ).add_to(group)
+        group.add_to(fmap)
         return
 
-    polylines = reconstruct_paths(graph, solution.order)
-    flat_coords = [coord for segment in polylines for coord in segment]
-    if flat_coords:
-        center = flat_coords[0]
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [marker["lon"], marker["lat"]]},
+            "properties": {
+                "popup": marker["popup"],
+                "style": {
+                    "radius": marker["radius"],
+                    "color": marker["color"],
+                    "weight": marker["weight"],
+                    "fill": True,
+                    "fillColor": marker["fillColor"],
+                    "fillOpacity": marker["fillOpacity"],
+                },
+            },
+        }
+        for marker in markers
+    ]
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        marker=folium.CircleMarker(),
+        style_function=_geojson_marker_style,
+        popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+    ).add_to(fmap)
+
+
+SolutionMapLayers = Tuple[Tuple[float, float], List[List[Tuple[float, float]]], List[Tuple[float, float]]]
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_solution_map_layers(graph_key: Tuple[str, int], order: Tuple[str, ...], _graph) -> SolutionMapLayers:
+    # graph_key は (ネットワークJSONのパス, mtime_ns)。ファイルが更新されれば別キーになる
+    return _solution_map_layers(_graph, order)
+
+
+def _solution_map(graph, order: Sequence[str]):
+    """経路の座標列は選択中ネットワークのキーでキャッシュし、folium.Map は表示ごとに新しく作る。"""
+    graph_key = (st.session_state.get("active_coords_entry") or {}).get("graph_key")
+    if graph_key is None:
+        layers = _solution_map_layers(graph, order)
     else:
-        start_node = graph.nodes[solution.order[0]]
-        center = (float(start_node.get("lat", 0.0)), float(start_node.get("lon", 0.0)))
+        layers = _cached_solution_map_layers(graph_key, tuple(order), graph)
+    return _build_solution_map(order, *layers)
 
-    fmap = folium.Map(location=center, zoom_start=12)
 
-    total_points = len(solution.order)
-    for idx, point_id in enumerate(solution.order, start=1):
+def _solution_map_layers(graph, order: Sequence[str]) -> SolutionMapLayers:
+    polylines = reconstruct_paths(graph, order)
+    # 停車地点の座標は1回だけ引き、中心計算とマーカー描画で共有する
+    stops: List[Tuple[float, float]] = []
+    for point_id in order:
         node = graph.nodes[point_id]
-        lat = float(node.get("lat", 0.0))
-        lon = float(node.get("lon", 0.0))
+        stops.append((float(node.get("lat", 0.0)), float(node.get("lon", 0.0))))
+    center = next((segment[0] for segment in polylines if segment), stops[0])
+    return center, polylines, stops
+
+
+def _build_solution_map(
+    order: Sequence[str],
+    center: Tuple[float, float],
+    polylines: List[List[Tuple[float, float]]],
+    stops: List[Tuple[float, float]],
+):
+    fmap = folium.Map(location=center, zoom_start=12)
+
+    total_points = len(stops)
+    markers: List[Dict[str, object]] = []
+    for idx, (point_id, (lat, lon)) in enumerate(zip(order, stops), start=1):
         if idx == 1:
             circle_color = "#2e7d32"
         elif idx == total_points:
@@ -1768,16 +2054,18 @@ def _display_route_map_only(graph, solution: Solution) -> None:
         else:
             circle_color = "#1565c0"
 
-        folium.CircleMarker(
-            location=[lat, lon],
-            radius=7,
-            color=circle_color,
-            weight=3,
-            fill=True,
-            fill_color=circle_color,
-            fill_opacity=0.85,
-            popup=f"{idx}. {point_id}",
-        ).add_to(fmap)
+        markers.append(
+            {
+                "lat": lat,
+                "lon": lon,
+                "radius": 7,
+                "color": circle_color,
+                "weight": 3,
+                "fillColor": circle_color,
+                "fillOpacity": 0.85,
+                "popup": f"{idx}. {point_id}",
+            }
+        )
 
         if idx == 1:
             icon_anchor = (10, 20)
@@ -1801,15 +2089,37 @@ def _display_route_map_only(graph, solution: Solution) -> None:
             ),
         ).add_to(fmap)
 
+    _add_circle_markers(fmap, markers)
+
     for segment in polylines:
         if segment:
             folium.PolyLine(segment, color="blue", weight=4, opacity=0.8).add_to(fmap)
+    return fmap
+
+
+def _display_route_map_only(graph, solution: Solution) -> None:
+    """
+    ルートの地図のみを表示する。
+
+    Args:
+        graph: グラフオブジェクト
+        solution: ルート解
+    """
+    if folium is None or st_folium is None:  # pragma: no cover
+        st.info("地図表示にはfoliumとstreamlit-foliumが必要です。")
+        return
 
+    fmap = _solution_map(graph, solution.order)
     st_folium(fmap, width=700, height=500)
 
 
 def _display_single_solution(
-    graph, solution: Solution, show_banner: bool = True, label_prefix: str = "", show_vehicle_info: bool = True
+    graph,
+    solution: Solution,
+    show_banner: bool = True,
+    label_prefix: str = "",
+    show_vehicle_info: bool = True,
+    show_breakdown: bool = True,
 ) -> None:
     if show_banner:
         st.success("最適化が完了しました。")
@@ -1824,87 +2134,27 @@ def _display_single_solution(
         st.write("採用車種:", solution.vehicle.name)
     st.write("ルート順:", " → ".join(solution.order))
 
-    breakdown_rows = [
-        {"項目": "固定費", "金額": solution.cost_breakdown.get("fixed_cost", 0.0)},
-        {"項目": "距離費", "金額": solution.cost_breakdown.get("distance_cost", 0.0)},
-        {"項目": "総額", "金額": solution.cost_breakdown.get("total_cost", 0.0)},
-    ]
-    if pd is not None:
-        st.table(pd.DataFrame(breakdown_rows))
-    else:  # pragma: no cover
-        st.write(breakdown_rows)
+    if show_breakdown:
+        breakdown_rows = [
+            {"項目": "固定費", "金額": solution.cost_breakdown.get("fixed_cost", 0.0)},
+            {"項目": "距離費", "金額": solution.cost_breakdown.get("distance_cost", 0.0)},
+            {"項目": "総額", "金額": solution.cost_breakdown.get("total_cost", 0.0)},
+        ]
+        if _load_pandas() is not None:
+            st.table(pd.DataFrame(breakdown_rows))
+        else:  # pragma: no cover
+            st.write(breakdown_rows)
 
     # 詳細コスト内訳の表示
     _display_detailed_cost_breakdown(solution.cost_breakdown, solution.vehicle.name)
 
-    try:
-        import folium  # type: ignore
-        from streamlit_folium import st_folium  # type: ignore
-    except ModuleNotFoundError:  # pragma: no cover
+    if folium is None or st_folium is None:  # pragma: no cover
         st.info("地図表示にはfoliumとstreamlit-foliumが必要です。")
         return
 
-    polylines = reconstruct_paths(graph, solution.order)
-    flat_coords = [coord for segment in polylines for coord in segment]
-    if flat_coords:
-        center = flat_coords[0]
-    else:
-        start_node = graph.nodes[solution.order[0]]
-        center = (float(start_node.get("lat", 0.0)), float(start_node.get("lon", 0.0)))
-
-    fmap = folium.Map(location=center, zoom_start=12)
-
-    total_points = len(solution.order)
-    for idx, point_id in enumerate(solution.order, start=1):
-        node = graph.nodes[point_id]
-        lat = float(node.get("lat", 0.0))
-        lon = float(node.get("lon", 0.0))
-        if idx == 1:
-            circle_color = "#2e7d32"
-        elif idx == total_points:
-            circle_color = "#c62828"
-        else:
-            circle_color = "#1565c0"
-
-        folium.CircleMarker(
-            location=[lat, lon],
-            radius=7,
-            color=circle_color,
-            weight=3,
-            fill=True,
-            fill_color=circle_color,
-            fill_opacity=0.85,
-            popup=f"{idx}. {point_id}",
-        ).add_to(fmap)
-
-        if idx == 1:
-            icon_anchor = (10, 20)
-        elif idx == total_points:
-            icon_anchor = (10, 0)
-        else:
-            icon_anchor = (10, 10)
-
-        badge_html = (
-            f"<div style=\"display:flex;align-items:center;justify-content:center;width:20px;height:20px;"
-            f"border-radius:50%;background-color:{circle_color};color:#ffffff;font-size:12px;font-weight:bold;\">"
-            f"{idx}</div>"
-        )
-
-        folium.map.Marker(
-            location=[lat, lon],
-            icon=folium.DivIcon(
-                icon_size=(20, 20),
-                icon_anchor=icon_anchor,
-                html=badge_html,
-            ),
-        ).add_to(fmap)
-
-    for segment in polylines:
-        if segment:
-            folium.PolyLine(segment, color="blue", weight=4, opacity=0.8).add_to(fmap)
-
+    fmap = _solution_map(graph, solution.order)
     st_folium(fmap, width=700, height=500)
-    if total_points:
+    if solution.order:
         st.caption("凡例: 1番目=出発, 最終番号=終点, 青=経路中間")
 
 
@@ -1926,11 +2176,31 @@ def _display_fleet_solution(
         {"項目": "距離費", "金額": fleet_solution.cost_breakdown.get("distance_cost", 0.0)},
         {"項目": "総額", "金額": fleet_solution.cost_breakdown.get("total_cost", 0.0)},
     ]
-    if pd is not None:
+    if _load_pandas() is not None:
         st.table(pd.DataFrame(breakdown_rows))
     else:  # pragma: no cover
         st.write(breakdown_rows)
 
+    # 車両ごとの費用内訳は1つの表にまとめて表示する
+    breakdown_keys = (("固定費", "fixed_cost"), ("距離費", "distance_cost"), ("総額", "total_cost"))
+    route_labels = [f"車両{idx}: {route.vehicle.name}" for idx, route in enumerate(fleet_solution.routes, start=1)]
+    if _load_pandas() is not None:
+        per_vehicle = pd.DataFrame(
+            {
+                name: [float(route.solution.cost_breakdown.get(key, 0.0)) for route in fleet_solution.routes]
+                for name, key in breakdown_keys
+            },
+            index=route_labels,
+        )
+        st.dataframe(per_vehicle.style.format("{:,.0f}"), use_container_width=True)
+    else:  # pragma: no cover
+        st.write(
+            [
+                {"車両": label, **{name: route.solution.cost_breakdown.get(key, 0.0) for name, key in breakdown_keys}}
+                for label, route in zip(route_labels, fleet_solution.routes)
+            ]
+        )
+
     plan_lookup: Dict[str, Dict[str, object]] = {}
     if plan_summary and isinstance(plan_summary, Sequence):
         plan_lookup = {
@@ -1953,6 +2223,7 @@ def _display_fleet_solution(
             show_banner=False,
             label_prefix=f"車両{idx} ",
             show_vehicle_info=False,
+            show_breakdown=False,
         )
 
 
@@ -1964,6 +2235,14 @@ def _display_comparison_results(
     plan_summary: Optional[Sequence[Dict[str, object]]] = None,
 ) -> None:
     """最適解と eCOM-10 代替案を並列表示"""
+    plan_lookup: Dict[str, Dict[str, object]] = {}
+    if plan_summary and isinstance(plan_summary, Sequence):
+        plan_lookup = {
+            str(entry.get("vehicle")): entry for entry in plan_summary if isinstance(entry, dict)
+        }
+    # 車両構成とルート詳細の両方で使うため、ルートと計画エントリの組を一度だけ作る
+    optimal_routes = [(route, plan_lookup.get(route.vehicle.name)) for route in optimal_solution.routes]
+
     st.markdown("## 📊 最適化結果の比較")
     st.markdown("---")
 
@@ -1981,7 +2260,7 @@ def _display_comparison_results(
 
         # 車両構成
         st.markdown("**📋 車両構成:**")
-        for idx, route in enumerate(optimal_solution.routes, start=1):
+        for route, _ in optimal_routes:
             st.write(f"・{route.vehicle.name}")
 
     # 右カラム: eCOM-10 代替案
@@ -1997,6 +2276,7 @@ def _display_comparison_results(
             if compatibility_result.incompatible_pickups:
                 st.markdown("**以下の資源はeCOM-10では運搬できません:**")
                 processed_master = st.session_state.get("processed_master")
+                from services.ecom10_comparison import find_alternative_vehicles
 
                 for pickup in compatibility_result.incompatible_pickups:
                     resource_type = pickup.get("kind", "不明")
@@ -2054,7 +2334,7 @@ def _display_comparison_results(
 
             # 車両構成
             st.markdown("**📋 車両構成:**")
-            for idx, route in enumerate(ecom10_solution.routes, start=1):
+            for route in ecom10_solution.routes:
                 st.write(f"・{route.vehicle.name}")
 
             # 警告・制約情報
@@ -2118,21 +2398,14 @@ def _display_comparison_results(
             {"項目": "変動費", "金額": f"{int(optimal_solution.cost_breakdown.get('distance_cost', 0)):,}"},
             {"項目": "総額", "金額": f"{int(optimal_solution.cost_breakdown.get('total_cost', 0)):,}"},
         ]
-        if pd is not None:
+        if _load_pandas() is not None:
             st.table(pd.DataFrame(breakdown_rows))
         else:
             st.write(breakdown_rows)
 
     # 各車両ごとのルート詳細
     st.markdown("### 🚗 各車両のルート詳細")
-    plan_lookup: Dict[str, Dict[str, object]] = {}
-    if plan_summary and isinstance(plan_summary, Sequence):
-        plan_lookup = {
-            str(entry.get("vehicle")): entry for entry in plan_summary if isinstance(entry, dict)
-        }
-
-    for idx, route in enumerate(optimal_solution.routes, start=1):
-        entry = plan_lookup.get(route.vehicle.name)
+    for idx, (route, entry) in enumerate(optimal_routes, start=1):
         st.subheader(f"車両 {idx}: {route.vehicle.name}")
         if entry:
             resources = entry.get("resources") or []
@@ -2195,8 +2468,10 @@ def main() -> None:
     processed_master = load_processed_master_cached()
     _init_session_state(processed_master)
     st.session_state["processed_master"] = processed_master
+    _refresh_vehicle_index(processed_master)
     _detect_abandoned_pickup_dialog()
     _process_pickup_dialog_result()
+    _apply_pending_pickup_edits()
 
     network_files = _list_network_files()
     if not network_files:
@@ -2205,34 +2480,16 @@ def main() -> None:
 
     selected_name = st.sidebar.selectbox("道路ネットワークファイル", options=list(network_files.keys()))
     selected_path = network_files[selected_name]
-    graph, metadata = load_graph(str(selected_path))
-
-    coords_cache: Dict[str, Dict[str, object]] = st.session_state.get("node_coords_cache", {})
-    cache_entry = coords_cache.get(selected_name)
-    if isinstance(cache_entry, list):  # backward compatibility with既存セッション
-        node_coords = cache_entry
-        node_lookup = _build_node_lookup(node_coords)
-        cache_entry = {"coords": node_coords, "lookup": node_lookup}
-        coords_cache[selected_name] = cache_entry
-        st.session_state["node_coords_cache"] = coords_cache
-    if cache_entry is None:
-        node_coords = _extract_node_coordinates(graph)
-        node_lookup = _build_node_lookup(node_coords)
-        cache_entry = {"coords": node_coords, "lookup": node_lookup}
-        coords_cache[selected_name] = cache_entry
-        st.session_state["node_coords_cache"] = coords_cache
-    node_coords = cache_entry["coords"]  # type: ignore[index]
-    node_lookup = cache_entry["lookup"]  # type: ignore[index]
-    node_ids = [str(entry["id"]) for entry in node_coords]
-
-    def edge_count() -> int:
-        try:
-            return graph.number_of_edges()  # type: ignore[attr-defined]
-        except AttributeError:
-            return sum(len(neighbours) for neighbours in getattr(graph, "_succ", {}).values())
+    graph, _ = load_graph(str(selected_path))
+
+    cache_entry = _get_graph_artifacts(str(selected_path))
+    st.session_state["active_coords_entry"] = cache_entry
+    node_coords: NodeCoords = cache_entry["coords"]  # type: ignore[index]
+    node_lookup: Dict[str, int] = cache_entry["lookup"]  # type: ignore[index]
+    node_ids = node_coords.ids  # SoA の id 配列をそのまま使う（コピーしない）
 
-    st.sidebar.write(f"ノード数: {metadata.get('node_count', len(graph.nodes))}")
-    st.sidebar.write(f"エッジ数: {metadata.get('edge_count', edge_count())}")
+    st.sidebar.write(f"ノード数: {cache_entry['node_count']}")
+    st.sidebar.write(f"エッジ数: {cache_entry['edge_count']}")
     st.sidebar.markdown("---")
     integrated_mode = st.sidebar.checkbox("統合最適化（案B）を使用", value=False, help="最大5便→最大4台にまとめる統合最適化を実行します。")
 
@@ -2270,7 +2527,8 @@ def main() -> None:
         st.error("ノードが存在しません。")
         return
 
-    _ensure_selection_defaults(node_ids)
+    spatial_index: SpatialIndex = cache_entry["index"]  # type: ignore[assignment]
+    _ensure_selection_defaults(node_ids, known_ids=node_lookup)
 
     # ========================================
     # セクション1: 地点選択
@@ -2292,9 +2550,10 @@ def main() -> None:
     sink_id = st.session_state.get("sink_id")
     pickup_selection: List[str] = st.session_state.get("pickup_selection", [])
 
-    selected_points = _collect_selected_points(depot_id, sink_id, pickup_selection, node_lookup)
+    selected_points = _collect_selected_points(depot_id, sink_id, pickup_selection, node_coords, node_lookup)
+    selected_lookup = _build_selected_point_lookup(selected_points)
     last_feedback = _find_selected_point(
-        selected_points,
+        selected_lookup,
         st.session_state.get("last_selected_node"),
         st.session_state.get("last_selected_role"),
     )
@@ -2302,7 +2561,7 @@ def main() -> None:
     focus_token = st.session_state.get("map_focus_token")
     if isinstance(focus_token, dict):
         focus_point = _find_selected_point(
-            selected_points,
+            selected_lookup,
             focus_token.get("node_id"),
             focus_token.get("role"),
         )
@@ -2310,8 +2569,6 @@ def main() -> None:
             last_feedback = focus_point
         st.session_state["map_focus_token"] = None
 
-    spatial_index = _get_spatial_index(selected_name, node_coords)
-
     # Phase 1-3: 地図凡例の強化
     st.markdown("---")
     st.subheader("🗺️ 地点選択マップ")
@@ -2330,43 +2587,43 @@ def main() -> None:
     map_state = _render_network_map(node_coords, selected_points, mode, last_feedback)
 
     if map_state and map_state.get("last_clicked"):
+        ss = st.session_state
         lat = map_state["last_clicked"].get("lat")
         lon = map_state["last_clicked"].get("lng")
         if lat is not None and lon is not None:
-            click_token = (round(float(lat), 6), round(float(lon), 6), mode)
-            if st.session_state.get("last_click_token") != click_token:
-                st.session_state["last_click_token"] = click_token
+            click_token = (round(float(lat) * 1_000_000), round(float(lon) * 1_000_000), mode)  # マイクロ度の整数
+            if ss.get("last_click_token") != click_token:
+                ss["last_click_token"] = click_token
                 result = spatial_index.nearest(float(lat), float(lon))
                 nearest = result.node_id
                 if nearest is not None:
                     if mode == "車庫":
-                        st.session_state["depot_id"] = nearest
+                        ss["depot_id"] = nearest
                         _set_last_selection(nearest, "depot")
                     elif mode == "集積場所":
-                        st.session_state["sink_id"] = nearest
+                        ss["sink_id"] = nearest
                         _set_last_selection(nearest, "sink")
+                    elif ss.get("pickup_dialog_open"):
+                        _toast("前の回収地点の入力を完了してください。", icon="⚠️")
                     else:
-                        if st.session_state.get("pickup_dialog_open"):
-                            _toast("前の回収地点の入力を完了してください。", icon="⚠️")
+                        pickups_set = set(ss.get("pickup_selection", []))
+                        if nearest in {ss.get("depot_id"), ss.get("sink_id")}:
+                            _toast("車庫または集積地点と同じノードは回収地点に追加できません。", icon="⚠️")
+                        elif nearest in pickups_set:
+                            _toast("既に追加済みの回収地点です。", icon="ℹ️")
                         else:
-                            pickups = st.session_state.get("pickup_selection", [])
-                            if nearest in {st.session_state["depot_id"], st.session_state["sink_id"]}:
-                                _toast("車庫または集積地点と同じノードは回収地点に追加できません。", icon="⚠️")
-                            elif nearest in pickups:
-                                _toast("既に追加済みの回収地点です。", icon="ℹ️")
-                            else:
-                                entry = node_lookup.get(nearest, {})
-                                st.session_state["pending_pickup"] = {
-                                    "node_id": nearest,
-                                    "label": entry.get("name") or nearest,
-                                    "lat": entry.get("lat"),
-                                    "lon": entry.get("lon"),
-                                }
-                                st.session_state["pending_pickup_defaults"] = _prepare_pending_defaults(nearest, processed_master)
-                                st.session_state["pickup_dialog_open"] = True
-                                st.session_state["pickup_dialog_rendered"] = False
-                                _toast(f"資源種別と量を入力: {nearest}", icon="📝")
-                                _set_last_selection(None, None)
+                            pos = node_lookup.get(nearest)
+                            ss["pending_pickup"] = {
+                                "node_id": nearest,
+                                "label": node_coords.names[pos] if pos is not None else nearest,
+                                "lat": float(node_coords.lats[pos]) if pos is not None else None,
+                                "lon": float(node_coords.lons[pos]) if pos is not None else None,
+                            }
+                            ss["pending_pickup_defaults"] = _prepare_pending_defaults(nearest, processed_master)
+                            ss["pickup_dialog_open"] = True
+                            ss["pickup_dialog_rendered"] = False
+                            _toast(f"資源種別と量を入力: {nearest}", icon="📝")
+                            _set_last_selection(None, None)
 
     # Pickup dialog for new points
     st.session_state["pickup_dialog_rendered"] = False
@@ -2394,8 +2651,11 @@ def main() -> None:
         st.subheader("📦 選択済み回収地点")
 
         # 各地点をカード形式で表示
+        pickup_attrs_view: Dict[str, Dict[str, object]] = st.session_state.get("pickup_attrs", {})
+        resource_names = sorted(processed_master.resources.keys()) if processed_master and processed_master.resources else []
+        resource_index = {name: i for i, name in enumerate(resource_names)}
         for idx, point_id in enumerate(pickup_selection, start=1):
-            attrs = st.session_state.get("pickup_attrs", {}).get(point_id, {})
+            attrs = pickup_attrs_view.get(point_id, {})
             qty = attrs.get("qty", 0)
             resource = attrs.get("resource") or attrs.get("kind", "未設定")
 
@@ -2404,22 +2664,18 @@ def main() -> None:
                 col1, col2, col3 = st.columns([3, 3, 1])
 
                 # Phase 2完了: シンプルな資源種別と回収量の編集
-                resource_names = sorted(processed_master.resources.keys()) if processed_master and processed_master.resources else []
                 if resource_names:
-                    try:
-                        default_index = resource_names.index(resource)
-                    except ValueError:
-                        default_index = 0
-                    new_resource = col1.selectbox(
+                    default_index = resource_index.get(resource, 0)
+                    col1.selectbox(
                         "資源種別",
                         resource_names,
                         index=default_index,
                         key=f"edit_resource_{point_id}"
                     )
                 else:
-                    new_resource = col1.text_input("資源種別", value=resource, key=f"edit_resource_{point_id}")
+                    col1.text_input("資源種別", value=resource, key=f"edit_resource_{point_id}")
 
-                new_qty = col2.number_input(
+                col2.number_input(
                     "回収量 (kg)",
                     min_value=0,
                     max_value=100000,
@@ -2428,36 +2684,18 @@ def main() -> None:
                     key=f"edit_qty_{point_id}",
                 )
 
-                # 更新ボタン
-                if col1.button("更新", key=f"update_{point_id}"):
-                    attrs_dict = st.session_state.get("pickup_attrs", {})
-                    attrs_dict[point_id] = {"qty": int(new_qty), "kind": new_resource, "resource": new_resource}
-                    st.session_state["pickup_attrs"] = attrs_dict
-                    st.success(f"✅ {point_id} を更新しました")
-                    st.rerun()
-
-                # 削除ボタン
-                if col3.button("🗑️", key=f"delete_{point_id}", help="この地点を削除"):
-                    pickups = st.session_state.get("pickup_selection", [])
-                    if point_id in pickups:
-                        pickups.remove(point_id)
-                        st.session_state["pickup_selection"] = pickups
-                    attrs_dict = st.session_state.get("pickup_attrs", {})
-                    if point_id in attrs_dict:
-                        attrs_dict.pop(point_id)
-                        st.session_state["pickup_attrs"] = attrs_dict
-                    st.success(f"🗑️ {point_id} を削除しました")
-                    st.rerun()
+                # 更新・削除はコールバックでキューに積み、main 冒頭でまとめて反映する
+                col1.button("更新", key=f"update_{point_id}", on_click=_queue_pickup_edit, args=("update", point_id))
+                col3.button(
+                    "🗑️",
+                    key=f"delete_{point_id}",
+                    help="この地点を削除",
+                    on_click=_queue_pickup_edit,
+                    args=("delete", point_id),
+                )
 
         # 一括削除ボタン
-        if st.button("🗑️ すべての回収地点をクリア", key="pickup_clear_all"):
-            st.session_state["pickup_selection"] = []
-            st.session_state["pickup_attrs"] = {}
-            _clear_pending_pickup()
-            st.success("🗑️ すべての回収地点を削除しました")
-            if st.session_state.get("last_selected_role") == "pickup":
-                _set_last_selection(None, None)
-            st.rerun()
+        st.button("🗑️ すべての回収地点をクリア", key="pickup_clear_all", on_click=_queue_pickup_edit, args=("clear_all",))
 
     # ========================================
     # セクション2: 最適化実行
@@ -2500,13 +2738,14 @@ def main() -> None:
     st.subheader("✅ 実行前チェック")
 
     # チェック項目の定義
+    pickup_attrs_map = st.session_state.get("pickup_attrs", {})
     checks = {
         "車庫が設定されている": depot_id is not None,
         "集積場所が設定されている": sink_id is not None,
         "車庫と集積場所が異なる": depot_id != sink_id if (depot_id and sink_id) else False,
         "回収地点が1箇所以上ある": len(pickup_selection) > 0,
         "全回収地点に資源種別が設定されている": all(
-            pickup_id in st.session_state.get("pickup_attrs", {})
+            pickup_id in pickup_attrs_map
             for pickup_id in pickup_selection
         ) if pickup_selection else False,
         "車種が1種類以上設定されている": len(vehicles_defined) > 0,
@@ -2547,10 +2786,8 @@ def main() -> None:
                 st.error("資源に対応する車種割当を作成できませんでした。車種設定を見直してください。")
                 return
 
-            unique_nodes: List[str] = []
-            for node_id in [depot_id] + pickup_selection + [sink_id]:
-                if node_id not in unique_nodes:
-                    unique_nodes.append(node_id)
+            # 順序を保ったまま重複を除く
+            unique_nodes: List[str] = list(dict.fromkeys([depot_id, *pickup_selection, sink_id]))
 
             # ステップ1: 距離行列計算
             status_text.text("📊 距離行列を計算中...")
@@ -2563,7 +2800,7 @@ def main() -> None:
             status_text.text("🚗 車種割当を準備中...")
             progress_bar.progress(50)
 
-            assignments: List[Tuple["VehicleType", List[Dict[str, object]]]] = []
+            assignments: List[Tuple[VehicleType, List[Dict[str, object]]]] = []
             plan_summary: List[Dict[str, object]] = []
             for entry in vehicle_plan:
                 vehicle_type = _make_vehicle_type(entry.get("record", {}))
@@ -2591,12 +2828,8 @@ def main() -> None:
             status_text.text("⚡ 最適化を実行中...")
             progress_bar.progress(75)
 
-            # vehicle_metadata_mapの作成
-            vehicle_metadata_map: Dict[str, VehicleCandidate] = {}
-            processed_master = st.session_state.get("processed_master")
-            if processed_master and processed_master.vehicles:
-                for candidate in processed_master.vehicles:
-                    vehicle_metadata_map[candidate.name] = candidate
+            # processed_master 更新時に作成済みの vehicle_metadata_map を使う
+            vehicle_metadata_map: Dict[str, VehicleCandidate] = st.session_state.get("vehicle_metadata_map", {})
 
             with st.spinner("最適化を実行中..."):
                 if integrated_mode:
@@ -2630,20 +2863,11 @@ def main() -> None:
             ecom10_result = None
             ecom10_compatibility = None
             if isinstance(result, FleetSolution) and processed_master:
+                from services.ecom10_comparison import compute_ecom10_alternative
+
                 with st.spinner("eCOM-10 代替案を計算中..."):
                     # eCOM-10 車両を取得
-                    ecom10_vehicle = None
-                    other_vehicles = []
-
-                    for candidate in processed_master.vehicles:
-                        # VehicleCandidateをDict形式に変換してからVehicleTypeを生成
-                        vehicle_dict = _vehicle_candidate_to_dict(candidate)
-                        vehicle_type = _make_vehicle_type(vehicle_dict)
-
-                        if candidate.name == "eCOM-10":
-                            ecom10_vehicle = vehicle_type
-                        else:
-                            other_vehicles.append(vehicle_type)
+                    ecom10_vehicle, other_vehicles = _split_ecom10_vehicle_types(processed_master)
 
                     if ecom10_vehicle and other_vehicles:
                         ecom10_result, ecom10_compatibility = compute_ecom10_alternative(
@@ -2675,9 +2899,7 @@ def main() -> None:
                 }
 
         finally:
-            # プログレスバーをクリア
-            import time
-            time.sleep(1)
+            # プログレスバーをクリア（待機せず即座に消す）
             progress_bar.empty()
             status_text.empty()
 
@@ -2,36 +2,55 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from typing import Any, Callable, Hashable
 
 import networkx as nx
 
-_graph_cache: dict[Hashable, nx.Graph] = {}
-_distance_cache: dict[Hashable, Any] = {}
+# 大きな距離行列を無制限に保持しないよう、古いものから追い出す
+GRAPH_CACHE_MAXSIZE = 8
+DISTANCE_CACHE_MAXSIZE = 8
+
+_graph_cache: "OrderedDict[Hashable, nx.Graph]" = OrderedDict()
+_distance_cache: "OrderedDict[Hashable, Any]" = OrderedDict()
 
 
 def _normalise_key(key: Any) -> Hashable:
-    if isinstance(key, (tuple, list)):
-        return tuple(round(float(v), 6) if isinstance(v, (int, float)) else v for v in key)
+    """Round float components so nearly-equal coordinate keys share an entry.
+
+    Ints hash equal to their float value, so tuples without floats (e.g. path +
+    node ids) are returned as-is. Pass a ``frozenset`` for order-independent keys.
+    """
+
+    if isinstance(key, list):
+        key = tuple(key)
+    if isinstance(key, tuple) and any(isinstance(v, float) for v in key):
+        return tuple(round(v, 6) if isinstance(v, float) else v for v in key)
     return key
 
 
+def _lru_get_or_build(cache: "OrderedDict[Hashable, Any]", key: Any, builder: Callable[[], Any], maxsize: int) -> Any:
+    cache_key = _normalise_key(key)
+    if cache_key in cache:
+        cache.move_to_end(cache_key)
+        return cache[cache_key]
+    value = builder()
+    cache[cache_key] = value
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+    return value
+
+
 def cached_graph(key: Any, builder: Callable[[], nx.Graph]) -> nx.Graph:
     """Return a cached graph, building it via *builder* when missing."""
 
-    cache_key = _normalise_key(key)
-    if cache_key not in _graph_cache:
-        _graph_cache[cache_key] = builder()
-    return _graph_cache[cache_key]
+    return _lru_get_or_build(_graph_cache, key, builder, GRAPH_CACHE_MAXSIZE)
 
 
 def cached_distance_matrix(key: Any, builder: Callable[[], Any]) -> Any:
     """Return a cached distance matrix for the given key."""
 
-    cache_key = _normalise_key(key)
-    if cache_key not in _distance_cache:
-        _distance_cache[cache_key] = builder()
-    return _distance_cache[cache_key]
+    return _lru_get_or_build(_distance_cache, key, builder, DISTANCE_CACHE_MAXSIZE)
 
 
 def clear() -> None:
@@ -4,10 +4,16 @@ from __future__ import annotations
 
 import csv
 import re
+import sys
+import threading
+from functools import lru_cache
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Tuple
 
+# slots=True は Python 3.10 以降のみ対応（3.8/3.9 では通常の dataclass にする）。
+# infra は services に依存しないため、services._compat を使わずここで定義する
+_DATACLASS_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 _RANGE_SEPARATORS = {
     "〜": "-",
@@ -16,42 +22,49 @@ _RANGE_SEPARATORS = {
     "—": "-",
     "−": "-",
 }
+_RANGE_TRANS = str.maketrans(_RANGE_SEPARATORS)
+_BOM_TRANS = str.maketrans({"\ufeff": None})
+_EMPTY_TOKENS = frozenset(("-", "NA", "N/A"))
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+# 数値部分（先頭の数字・記号列）と単位部分を1回の照合で切り出す
+_NUMERIC_UNIT_RE = re.compile(r"([0-9.,+\-]*)(.*)", re.DOTALL)
+
+# (base_dir, 各 CSV の mtime_ns) -> 読込結果
+_MASTER_FILES = ("車両諸元表.csv", "車両資源適合性マトリックス.csv", "未利用資源特性表.csv", "補足データ集.csv")
+_MASTER_CACHE: Dict[Tuple[Path, Tuple[int, ...]], MasterData] = {}
+_MASTER_CACHE_LOCK = threading.Lock()
+
+
+def _strip_bom(text: str) -> str:
+    return text.translate(_BOM_TRANS).replace("\\xEF\\xBB\\xBF", "")
 
 
 def _clean_text(value: Optional[str | Iterable[str]]) -> Optional[str]:
     if value is None:
         return None
-    if isinstance(value, (list, tuple)):
-        joined = " ".join(str(part) for part in value if part not in {None, ""})
-        value = joined
-    cleaned = str(value).strip()
-    if not cleaned or cleaned in {"-", "NA", "N/A"}:
+    if not isinstance(value, str):
+        if isinstance(value, (list, tuple)):
+            value = " ".join(str(part) for part in value if part not in {None, ""})
+        else:
+            value = str(value)
+    cleaned = value.strip()
+    if not cleaned or cleaned in _EMPTY_TOKENS:
         return None
-    cleaned = cleaned.replace("\ufeff", "").replace("\\xEF\\xBB\\xBF", "").strip()
+    # BOM が含まれるセルは稀なので、含まれる場合だけ除去する
+    if "\ufeff" in cleaned or "\\xEF" in cleaned:
+        cleaned = _strip_bom(cleaned).strip()
     return cleaned or None
 
 
 def _split_numeric_unit(text: str) -> Tuple[str, Optional[str]]:
     if not text:
         return "", None
-    normalized = text
-    for old, new in _RANGE_SEPARATORS.items():
-        normalized = normalized.replace(old, new)
-    idx = 0
-    allowed = set("0123456789.,+-") | {"-"}
-    while idx < len(normalized):
-        char = normalized[idx]
-        if char in allowed:
-            idx += 1
-            continue
-        break
-    numeric_part = normalized[:idx].strip()
-    unit_part = normalized[idx:].strip() or None
-    return numeric_part, unit_part
+    numeric_part, unit_part = _NUMERIC_UNIT_RE.match(text.translate(_RANGE_TRANS)).groups()
+    return numeric_part.strip(), unit_part.strip() or None
 
 
 def _extract_numbers(text: str) -> List[float]:
-    tokens = re.findall(r"\d+(?:\.\d+)?", text.replace(",", ""))
+    tokens = _NUMBER_RE.findall(text.replace(",", ""))
     numbers: List[float] = []
     for token in tokens:
         try:
@@ -61,14 +74,14 @@ def _extract_numbers(text: str) -> List[float]:
     return numbers
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class RangeValue:
     minimum: float
     maximum: float
     average: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class NumericValue:
     raw: Optional[str]
     value: Optional[float]
@@ -76,10 +89,19 @@ class NumericValue:
     unit: Optional[str]
 
 
+_EMPTY_NUMERIC = NumericValue(raw=None, value=None, range=None, unit=None)
+
+
 def parse_numeric_value(value: Optional[str]) -> NumericValue:
     cleaned = _clean_text(value)
     if cleaned is None:
-        return NumericValue(raw=None, value=None, range=None, unit=None)
+        return _EMPTY_NUMERIC
+    return _parse_numeric_text(cleaned)
+
+
+# マスタの数値セルは同じ文字列の繰り返しが多いので、整形後の文字列単位で解析結果を共有する（結果は不変）
+@lru_cache(maxsize=4096)
+def _parse_numeric_text(cleaned: str) -> NumericValue:
     numeric_text, unit = _split_numeric_unit(cleaned)
     numbers = _extract_numbers(numeric_text)
     if not numbers:
@@ -97,22 +119,29 @@ def parse_numeric_value(value: Optional[str]) -> NumericValue:
 
 def _read_csv(path: Path) -> Tuple[List[str], List[Dict[str, Optional[str]]]]:
     with path.open("r", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        fieldnames = [
-            (name or "").replace("\ufeff", "").replace("\\xEF\\xBB\\xBF", "").strip()
-            for name in reader.fieldnames or []
-        ]
+        reader = csv.reader(handle)
+        header = next(reader, None)
+        if header is None:
+            return [], []
+        # ヘッダーは一度だけ正規化し、各行は値の整形と dict 生成を1回ずつ行う
+        fieldnames = [_strip_bom(name).strip() for name in header]
+        width = len(fieldnames)
         rows: List[Dict[str, Optional[str]]] = []
-        for raw_row in reader:
-            cleaned_row: Dict[str, Optional[str]] = {}
-            for key, value in raw_row.items():
-                clean_key = (key or "").replace("\ufeff", "").replace("\\xEF\\xBB\\xBF", "").strip()
-                cleaned_row[clean_key] = _clean_text(value)
+        for values in reader:
+            if not values:
+                continue
+            cleaned_row = dict(zip(fieldnames, map(_clean_text, values)))
+            if len(values) < width:
+                for name in fieldnames[len(values):]:
+                    cleaned_row[name] = None
+            elif len(values) > width:
+                # DictReader と同様、余分な列は空キーにまとめる
+                cleaned_row[""] = _clean_text(values[width:])
             rows.append(cleaned_row)
         return fieldnames, rows
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class VehicleSpec:
     name: str
     load_volume_m3: NumericValue
@@ -125,18 +154,23 @@ class VehicleSpec:
     raw: Dict[str, Optional[str]]
 
 
+_VEHICLE_TEXT_COLUMNS = frozenset(("車両タイプ", "燃料タイプ", "運転免許", "備考"))
+
+
 def _load_vehicle_specs(path: Path) -> Dict[str, VehicleSpec]:
-    _, rows = _read_csv(path)
+    fieldnames, rows = _read_csv(path)
+    columns = list(dict.fromkeys(fieldnames))
+    # 数値列はヘッダーから一度だけ決める（余分な列がある行だけ行ごとに判定する）
+    metric_columns = [column for column in columns if column not in _VEHICLE_TEXT_COLUMNS]
     vehicles: Dict[str, VehicleSpec] = {}
     for row in rows:
         name = row.get("車両タイプ")
         if not name:
             continue
-        metrics: Dict[str, NumericValue] = {}
-        for key, value in row.items():
-            if key in {"車両タイプ", "燃料タイプ", "運転免許", "備考"}:
-                continue
-            metrics[key] = parse_numeric_value(value)
+        if len(row) == len(columns):
+            metrics = {column: parse_numeric_value(row[column]) for column in metric_columns}
+        else:
+            metrics = {key: parse_numeric_value(value) for key, value in row.items() if key not in _VEHICLE_TEXT_COLUMNS}
         spec = VehicleSpec(
             name=name,
             load_volume_m3=parse_numeric_value(row.get("積載容積_m3")),
@@ -152,46 +186,50 @@ def _load_vehicle_specs(path: Path) -> Dict[str, VehicleSpec]:
     return vehicles
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class CompatibilityInfo:
     vehicle_type: str
     supported_resources: Dict[str, Optional[bool]]
     requirements: Dict[str, Optional[str]]
 
 
+_BOOL_TOKENS: Dict[str, bool] = {
+    "1": True,
+    "true": True,
+    "TRUE": True,
+    "yes": True,
+    "0": False,
+    "false": False,
+    "FALSE": False,
+    "no": False,
+}
+
+
 def _parse_bool_token(token: Optional[str]) -> Optional[bool]:
     if token is None:
         return None
-    if token in {"1", "true", "TRUE", "yes"}:
-        return True
-    if token in {"0", "false", "FALSE", "no"}:
-        return False
-    return None
+    return _BOOL_TOKENS.get(token)
 
 
 def _load_compatibility(path: Path) -> Dict[str, CompatibilityInfo]:
     fieldnames, rows = _read_csv(path)
-    base_columns = [name for name in fieldnames if not name.startswith("条件付き適合_") and name != "車両タイプ"]
+    columns = list(dict.fromkeys(fieldnames))
+    base_columns = [name for name in columns if not name.startswith("条件付き適合_") and name != "車両タイプ"]
+    conditional_columns = [
+        (name, name.replace("条件付き適合_", "")) for name in columns if name.startswith("条件付き適合_")
+    ]
     compatibility: Dict[str, CompatibilityInfo] = {}
     for row in rows:
         vehicle = row.get("車両タイプ")
         if not vehicle:
             continue
-        supported: Dict[str, Optional[bool]] = {}
-        requirements: Dict[str, Optional[str]] = {}
-        for column in base_columns:
-            if column == "車両タイプ":
-                continue
-            supported[column] = _parse_bool_token(row.get(column))
-        for key, value in row.items():
-            if key.startswith("条件付き適合_"):
-                resource = key.replace("条件付き適合_", "")
-                requirements[resource] = value
+        supported = {column: _parse_bool_token(row.get(column)) for column in base_columns}
+        requirements = {resource: row.get(column) for column, resource in conditional_columns}
         compatibility[vehicle] = CompatibilityInfo(vehicle_type=vehicle, supported_resources=supported, requirements=requirements)
     return compatibility
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ResourceTrait:
     name: str
     bulk_density_t_per_m3: Optional[RangeValue]
@@ -254,7 +292,7 @@ def _load_resource_traits(path: Path) -> Dict[str, ResourceTrait]:
     return traits
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class SupplementEntry:
     category: str
     item: Optional[str]
@@ -269,6 +307,10 @@ class SupplementData:
     notes: List[SupplementEntry] = field(default_factory=list)
 
 
+# 「1.」〜「9.」で始まる項目は注記として扱う
+_CATEGORY_NUMERIC_PREFIXES = tuple(f"{num}." for num in range(1, 10))
+
+
 def _load_supplement(path: Path) -> SupplementData:
     _, rows = _read_csv(path)
     entries: Dict[str, List[SupplementEntry]] = {}
@@ -283,7 +325,7 @@ def _load_supplement(path: Path) -> SupplementData:
             description=row.get("説明"),
             raw=row,
         )
-        if category and not category.startswith(tuple(str(num) + "." for num in range(1, 10))) and not category.startswith("注記"):
+        if category and not category.startswith(_CATEGORY_NUMERIC_PREFIXES) and not category.startswith("注記"):
             entries.setdefault(category, []).append(entry)
         else:
             notes.append(entry)
@@ -299,16 +341,26 @@ class MasterData:
 
     @classmethod
     def load(cls, base_dir: Path) -> "MasterData":
-        vehicles = _load_vehicle_specs(base_dir / "車両諸元表.csv")
-        compatibility = _load_compatibility(base_dir / "車両資源適合性マトリックス.csv")
-        resource_traits = _load_resource_traits(base_dir / "未利用資源特性表.csv")
-        supplement = _load_supplement(base_dir / "補足データ集.csv")
-        return cls(
-            vehicles=vehicles,
-            compatibility=compatibility,
-            resource_traits=resource_traits,
-            supplement=supplement,
-        )
+        """Load the four master CSVs, reusing the previous result while none of them changed."""
+
+        paths = tuple(base_dir / name for name in _MASTER_FILES)
+        key = (base_dir.resolve(), tuple(path.stat().st_mtime_ns for path in paths))
+        with _MASTER_CACHE_LOCK:
+            cached = _MASTER_CACHE.get(key)
+            if cached is not None:
+                return cached
+            vehicles_path, compatibility_path, traits_path, supplement_path = paths
+            master = cls(
+                vehicles=_load_vehicle_specs(vehicles_path),
+                compatibility=_load_compatibility(compatibility_path),
+                resource_traits=_load_resource_traits(traits_path),
+                supplement=_load_supplement(supplement_path),
+            )
+            # 同じディレクトリの古い版は捨てる
+            for stale in [k for k in _MASTER_CACHE if k[0] == key[0]]:
+                del _MASTER_CACHE[stale]
+            _MASTER_CACHE[key] = master
+            return master
 
 
 __all__ = [
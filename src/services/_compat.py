@@ -0,0 +1,9 @@
+"""Python version compatibility helpers shared across modules."""
+
+from __future__ import annotations
+
+import sys
+from typing import Dict
+
+# slots=True は Python 3.10 以降のみ対応（3.8/3.9 では通常の dataclass にする）
+_DATACLASS_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
@@ -2,16 +2,37 @@
 
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass, field
-from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
-from typing import Dict, Optional
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, Optional, Tuple
 
 from .vehicle_catalog import VehicleType
+from ._compat import _DATACLASS_SLOTS
 from .master_repository import VehicleCandidate
 
+# 車両メタデータごとにキャッシュする単価の上限件数
+_VEHICLE_RATES_CACHE_MAXSIZE = 64
 
-def _to_decimal(value: float) -> Decimal:
-    """Safely convert floats (or float-like values) to ``Decimal`` for currency math."""
+# 丸め前に小数点以下この桁で揃え、2進誤差（2.675 -> 2.67499...）で四捨五入がずれないようにする
+_CURRENCY_GUARD_DIGITS = 9
+
+_ONE = Decimal("1")
+_THOUSAND = Decimal("1000")
+_TEN_THOUSAND = Decimal("10000")
+
+
+def _to_float(value: object) -> float:
+    """Safely convert float-like values for currency math."""
+
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except (ValueError, TypeError):  # pragma: no cover - defensive
+        return 0.0
+
+
+def _to_decimal(value: object) -> Decimal:
+    """Convert float-like values to ``Decimal`` via their shortest repr, as the inputs were written."""
 
     try:
         return Decimal(str(value))
@@ -19,7 +40,14 @@ def _to_decimal(value: float) -> Decimal:
         return Decimal(0)
 
 
-@dataclass(frozen=True)
+def _half_up_int(value: float) -> int:
+    """Round to the nearest yen, halves away from zero (``ROUND_HALF_UP``)."""
+
+    value = round(value, _CURRENCY_GUARD_DIGITS)
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class CostComponents:
     """Structured representation of cost calculation results."""
 
@@ -32,17 +60,35 @@ class CostComponents:
     details: Dict[str, float] = field(default_factory=dict)
 
 
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
+class _VehicleRates:
+    """Per-vehicle unit rates read from ``VehicleCandidate`` once, outside the evaluate() hot path."""
+
+    variable_per_km: Tuple[Tuple[str, float], ...]
+    hourly_wage: float
+    average_speed: float
+    loading_sec_per_kg: float
+    # 固定費は (項目キー, 年間固定費[円]) と年間走行距離を Decimal で持ち、割り算は距離を掛けた後に行う
+    fixed_annual_yen: Tuple[Tuple[str, Decimal], ...]
+    annual_distance_km: Decimal
+
+
 class CostCalculator:
     """Centralised component that evaluates vehicle costs consistently."""
 
     def __init__(self, rounding=ROUND_HALF_UP) -> None:
         self.rounding = rounding
+        # VehicleCandidate は dict を持つため hash できない。id をキーにし、本体も保持して id の再利用を防ぐ
+        self._rates_cache: Dict[int, Tuple[VehicleCandidate, _VehicleRates]] = {}
 
-    def _round_currency(self, value: Decimal) -> int:
-        return int(value.quantize(Decimal("1"), rounding=self.rounding))
+    def _round_currency(self, value: float) -> int:
+        if self.rounding == ROUND_HALF_UP:
+            return _half_up_int(value)
+        # 既定以外の丸めモードのみ Decimal を経由する
+        return int(Decimal(repr(round(value, _CURRENCY_GUARD_DIGITS))).quantize(_ONE, rounding=self.rounding))
 
-    def _distance_km(self, distance_m: float) -> Decimal:
-        return _to_decimal(distance_m) / Decimal("1000")
+    def _distance_km(self, distance_m: float) -> float:
+        return _to_float(distance_m) / 1000.0
 
     def evaluate(
         self,
@@ -53,7 +99,7 @@ class CostCalculator:
     ) -> CostComponents:
         """Compute cost components for a vehicle travelling ``distance_m`` metres."""
 
-        distance_km_dec = self._distance_km(distance_m)
+        distance_km = self._distance_km(distance_m)
         details: Dict[str, float] = {}
 
         if metadata:
@@ -66,13 +112,13 @@ class CostCalculator:
                 variable_details,
                 variable_refs,
                 metadata,
-                distance_km_dec,
+                distance_km,
                 total_demand_kg=max(0, int(total_demand_kg)),
             )
-            self._append_fixed_details(fixed_details, metadata, distance_km_dec)
+            self._append_fixed_details(fixed_details, metadata, distance_m)
 
             # 車両定義の fixed_cost は「距離に依らない固定費（1回あたり）」として扱う。
-            base_fixed_cost = self._round_currency(_to_decimal(vehicle.fixed_cost))
+            base_fixed_cost = self._round_currency(_to_float(vehicle.fixed_cost))
             if base_fixed_cost != 0:
                 fixed_details["固定費_基本固定費"] = base_fixed_cost
 
@@ -84,31 +130,31 @@ class CostCalculator:
             if variable_details:
                 distance_cost = int(sum(int(v) for v in variable_details.values()))
             else:
-                distance_cost = self._round_currency(_to_decimal(vehicle.per_km_cost) * distance_km_dec)
+                distance_cost = self._round_currency(_to_float(vehicle.per_km_cost) * distance_km)
 
             if fixed_details:
                 fixed_cost = int(sum(int(v) for v in fixed_details.values()))
             else:
                 fixed_cost = self._round_currency(
-                    _to_decimal(vehicle.fixed_cost) + _to_decimal(vehicle.fixed_cost_per_km) * distance_km_dec
+                    _to_float(vehicle.fixed_cost) + _to_float(vehicle.fixed_cost_per_km) * distance_km
                 )
         else:
             fixed_cost = self._round_currency(
-                _to_decimal(vehicle.fixed_cost) + _to_decimal(vehicle.fixed_cost_per_km) * distance_km_dec
+                _to_float(vehicle.fixed_cost) + _to_float(vehicle.fixed_cost_per_km) * distance_km
             )
-            distance_cost = self._round_currency(_to_decimal(vehicle.per_km_cost) * distance_km_dec)
+            distance_cost = self._round_currency(_to_float(vehicle.per_km_cost) * distance_km)
 
         total_cost = int(fixed_cost) + int(distance_cost)
 
         energy_kwh = None
         if vehicle.energy_consumption_kwh_per_km > 0:
-            energy_kwh = round(float(vehicle.energy_consumption_kwh_per_km) * float(distance_km_dec), 3)
+            energy_kwh = round(float(vehicle.energy_consumption_kwh_per_km) * distance_km, 3)
 
         return CostComponents(
             fixed_cost=fixed_cost,
             distance_cost=distance_cost,
             total_cost=total_cost,
-            distance_km=float(distance_km_dec),
+            distance_km=distance_km,
             energy_kwh=energy_kwh,
             details=details,
         )
@@ -118,7 +164,7 @@ class CostCalculator:
         details: Dict[str, int],
         refs: Dict[str, float],
         metadata: VehicleCandidate,
-        distance_km_dec: Decimal,
+        distance_km: float,
         total_demand_kg: int,
     ) -> None:
         # 変動費は必要最小項目に限定する:
@@ -126,56 +172,82 @@ class CostCalculator:
         # - 損料(円/km) ※タイヤ+修理を集約したもの
         # - 運転手人件費(円/h) -> 距離/平均速度で計算
         # - 作業時間人件費(円/kg) -> 総重量×作業効率で計算
-        breakdown = metadata.variable_cost_breakdown or {}
+        rates = self._vehicle_rates(metadata)
 
         # fuel / damage (yen per km)
-        for item_name in ("燃料費_円_per_km", "損料_円_per_km"):
-            if item_name not in breakdown:
-                continue
-            unit_cost = breakdown.get(item_name) or 0.0
-            item_key = f"変動費_{item_name}"
-            try:
-                amount = self._round_currency(_to_decimal(unit_cost) * distance_km_dec)
-            except InvalidOperation:  # pragma: no cover - defensive
+        for item_key, unit_cost in rates.variable_per_km:
+            amount = unit_cost * distance_km
+            if not math.isfinite(amount):  # NaN / inf の単価はその項目だけ読み飛ばす
                 continue
-            details[item_key] = amount
+            details[item_key] = self._round_currency(amount)
 
         # driver labor cost (yen per hour)
-        hourly_wage = float(metadata.hourly_wage or 0.0)
-        average_speed = float(metadata.average_speed_km_per_h or 0.0)
-        if hourly_wage > 0 and average_speed > 0 and float(distance_km_dec) > 0:
-            hours = _to_decimal(float(distance_km_dec)) / _to_decimal(average_speed)
-            details["変動費_運転手人件費"] = self._round_currency(_to_decimal(hourly_wage) * hours)
+        hourly_wage = rates.hourly_wage
+        average_speed = rates.average_speed
+        if hourly_wage > 0 and average_speed > 0 and distance_km > 0:
+            hours = distance_km / average_speed
+            details["変動費_運転手人件費"] = self._round_currency(hourly_wage * hours)
 
         # loading labor cost (yen per kg)
-        loading_sec_per_kg = float(metadata.loading_time_per_kg or 0.0)
+        loading_sec_per_kg = rates.loading_sec_per_kg
         if hourly_wage > 0 and loading_sec_per_kg > 0 and total_demand_kg > 0:
-            hours = (_to_decimal(total_demand_kg) * _to_decimal(loading_sec_per_kg)) / Decimal("3600")
-            details["変動費_作業時間人件費"] = self._round_currency(_to_decimal(hourly_wage) * hours)
+            hours = (total_demand_kg * loading_sec_per_kg) / 3600.0
+            details["変動費_作業時間人件費"] = self._round_currency(hourly_wage * hours)
             # Reference key for UI display (not counted in distance_cost)
-            unit_yen_per_kg = (_to_decimal(hourly_wage) * _to_decimal(loading_sec_per_kg)) / Decimal("3600")
-            refs["変動費_作業時間人件費_円_per_kg"] = float(unit_yen_per_kg)
+            refs["変動費_作業時間人件費_円_per_kg"] = (hourly_wage * loading_sec_per_kg) / 3600.0
 
     def _append_fixed_details(
         self,
         details: Dict[str, int],
         metadata: VehicleCandidate,
-        distance_km_dec: Decimal,
+        distance_m: float,
     ) -> None:
-        breakdown = metadata.fixed_cost_breakdown or {}
-        annual_distance = metadata.annual_distance_km or 0
-        if annual_distance <= 0:
+        rates = self._vehicle_rates(metadata)
+        if not rates.fixed_annual_yen:
             return
-        annual_distance_dec = _to_decimal(annual_distance)
-        for item_name, manyen_value in breakdown.items():
-            item_key = f"固定費_{item_name}"
+        # 年額を按分した金額は .5 のわずか手前（1e-14 程度）になることがあり、float では区別できない。
+        # 項目数が少ないので Decimal で計算し、年額×距離÷年間距離の順（割り算を最後）にする
+        distance_km = _to_decimal(distance_m) / _THOUSAND
+        annual_distance = rates.annual_distance_km
+        for item_key, annual_yen in rates.fixed_annual_yen:
             try:
-                annual_yen = _to_decimal(manyen_value) * Decimal("10000")
-                per_km = annual_yen / annual_distance_dec
-                amount = self._round_currency(per_km * distance_km_dec)
-            except (InvalidOperation, ZeroDivisionError):  # pragma: no cover - defensive
+                amount = (annual_yen * distance_km / annual_distance).quantize(_ONE, rounding=self.rounding)
+            except InvalidOperation:  # pragma: no cover - defensive (NaN / inf)
                 continue
-            details[item_key] = amount
+            details[item_key] = int(amount)
+
+    def _vehicle_rates(self, metadata: VehicleCandidate) -> _VehicleRates:
+        cached = self._rates_cache.get(id(metadata))
+        if cached is not None and cached[0] is metadata:
+            return cached[1]
+
+        variable_breakdown = metadata.variable_cost_breakdown or {}
+        variable_per_km = tuple(
+            (f"変動費_{item_name}", _to_float(variable_breakdown.get(item_name) or 0.0))
+            for item_name in ("燃料費_円_per_km", "損料_円_per_km")
+            if item_name in variable_breakdown
+        )
+        # 年間固定費(万円)は円に換算しておき、年間走行距離での按分は evaluate 時に行う
+        fixed_breakdown = metadata.fixed_cost_breakdown or {}
+        annual_distance = _to_decimal(metadata.annual_distance_km or 0)
+        fixed_annual_yen: Tuple[Tuple[str, Decimal], ...] = ()
+        if annual_distance > 0:
+            fixed_annual_yen = tuple(
+                (f"固定費_{item_name}", _to_decimal(manyen_value) * _TEN_THOUSAND)
+                for item_name, manyen_value in fixed_breakdown.items()
+            )
+        rates = _VehicleRates(
+            variable_per_km=variable_per_km,
+            hourly_wage=float(metadata.hourly_wage or 0.0),
+            average_speed=float(metadata.average_speed_km_per_h or 0.0),
+            loading_sec_per_kg=float(metadata.loading_time_per_kg or 0.0),
+            fixed_annual_yen=fixed_annual_yen,
+            annual_distance_km=annual_distance,
+        )
+        if len(self._rates_cache) >= _VEHICLE_RATES_CACHE_MAXSIZE:
+            self._rates_cache.clear()
+        self._rates_cache[id(metadata)] = (metadata, rates)
+        return rates
 
 
 def cost_components_to_breakdown(components: CostComponents) -> Dict[str, float]:
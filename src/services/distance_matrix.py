@@ -2,13 +2,29 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import heapq
+import weakref
+from dataclasses import dataclass, field
+from itertools import count
+from typing import AbstractSet, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
 
 import networkx as nx
 
+from ._compat import _DATACLASS_SLOTS
 from .spatial_index import SpatialIndex
 
+try:  # Optional dependency for vectorised matrix assembly
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional
+    np = None  # type: ignore
+
+try:  # Optional: SciPy's C Dijkstra over a CSR adjacency
+    from scipy.sparse import csr_matrix  # type: ignore
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - optional
+    csr_matrix = None  # type: ignore
+    csgraph_dijkstra = None  # type: ignore
+
 # Sentinel value for unreachable pairs.
 UNREACHABLE_COST = 1e9
 
@@ -17,7 +33,7 @@ class DistanceMatrixError(RuntimeError):
     """Raised when distance matrix construction fails."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class SnappedPoint:
     """Represents a point snapped onto a graph node."""
 
@@ -35,20 +51,37 @@ class SnappedPoint:
             object.__setattr__(self, "distance_m", float(self.connector_distance_m))
 
 
+MatrixLike = Union[List[List[float]], "np.ndarray"]
+
+
 @dataclass
 class DistanceMatrix:
-    """Holds a dense distance matrix with helper lookups."""
+    """Holds a dense distance matrix with helper lookups.
 
-    matrix: List[List[float]]
+    *matrix* is a contiguous ``float64`` ``ndarray`` when numpy is available,
+    otherwise a list of lists; both support ``matrix[i][j]``.
+    """
+
+    matrix: MatrixLike
     index_map: Dict[str, int]
     node_lookup: Dict[str, Union[int, str]]
     connector_offsets: Dict[str, float]
+    # 接続距離込みの実効距離行列（ndarray の場合のみ構築時に一度だけ計算）
+    _effective: Optional["np.ndarray"] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if np is not None and isinstance(self.matrix, np.ndarray):
+            effective = self._with_offsets(self.matrix)
+            effective.flags.writeable = False
+            self._effective = effective
 
     def distance(self, from_id: str, to_id: str) -> float:
         """Return the distance in metres between two points."""
 
         i = self._index(from_id)
         j = self._index(to_id)
+        if self._effective is not None:
+            return float(self._effective[i, j])
         if i == j:
             return 0.0
         base = float(self.matrix[i][j])
@@ -62,30 +95,24 @@ class DistanceMatrix:
         except KeyError as exc:
             raise KeyError(f"Unknown point id: {point_id}") from exc
 
+    def _with_offsets(self, matrix: MatrixLike):
+        arr = np.array(matrix, dtype=np.float64, copy=True)
+        offsets = np.zeros(len(arr), dtype=np.float64)
+        for point_id, idx in self.index_map.items():
+            offsets[idx] = self.connector_offsets.get(point_id, 0.0)
+        reachable = arr < UNREACHABLE_COST
+        arr[reachable] += (offsets[:, None] + offsets[None, :])[reachable]
+        np.fill_diagonal(arr, 0.0)
+        return arr
+
     def as_numpy(self):  # pragma: no cover - optional dependency
         """Return the matrix as a ``numpy.ndarray`` if numpy is available."""
 
-        try:
-            import numpy as np  # type: ignore
-        except ModuleNotFoundError as exc:  # pragma: no cover
-            raise RuntimeError("numpy is required for ndarray conversion") from exc
-        arr = np.array(self.matrix, copy=True)
-        ordered: List[str] = [""] * len(self.index_map)
-        for point_id, idx in self.index_map.items():
-            ordered[idx] = point_id
-        for i, from_id in enumerate(ordered):
-            for j, to_id in enumerate(ordered):
-                if i == j:
-                    arr[i][j] = 0.0
-                    continue
-                if arr[i][j] >= UNREACHABLE_COST:
-                    continue
-                arr[i][j] = (
-                    arr[i][j]
-                    + self.connector_offsets.get(from_id, 0.0)
-                    + self.connector_offsets.get(to_id, 0.0)
-                )
-        return arr
+        if self._effective is not None:
+            return np.array(self._effective, copy=True)
+        if np is None:  # pragma: no cover
+            raise RuntimeError("numpy is required for ndarray conversion")
+        return self._with_offsets(self.matrix)
 
     def is_reachable(self, from_id: str, to_id: str) -> bool:
         """True if the pair is considered reachable."""
@@ -118,6 +145,39 @@ def _normalise_point(point: PointInput) -> SnappedPoint:
     )
 
 
+# グラフ毎のスナップ用空間索引（複数地点のスナップで共有する）
+_SNAP_INDEX_CACHE: "weakref.WeakKeyDictionary[nx.Graph, Tuple[int, SpatialIndex]]" = weakref.WeakKeyDictionary()
+
+
+def _graph_spatial_index(graph: nx.Graph) -> SpatialIndex:
+    """Return a :class:`SpatialIndex` over *graph*'s node coordinates, built once per graph."""
+
+    stamp = graph.number_of_nodes()
+    cached = _SNAP_INDEX_CACHE.get(graph)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    node_ids: List[str] = []
+    lats: List[float] = []
+    lons: List[float] = []
+    node_iter = graph.nodes(data=True) if callable(getattr(graph, "nodes", None)) else graph.nodes.items()  # type: ignore[attr-defined]
+    for node_id, data in node_iter:
+        node_lat = data.get("lat") or data.get("y")
+        node_lon = data.get("lon") or data.get("x")
+        if node_lat is None or node_lon is None:
+            continue
+        node_ids.append(str(node_id))
+        lats.append(float(node_lat))
+        lons.append(float(node_lon))
+
+    if not node_ids:
+        raise DistanceMatrixError("Graph nodes do not contain coordinate attributes")
+
+    index = SpatialIndex.from_arrays(node_ids, lats, lons)
+    _SNAP_INDEX_CACHE[graph] = (stamp, index)
+    return index
+
+
 def snap_to_graph(graph: nx.Graph, point: Mapping[str, object]) -> SnappedPoint:
     """Snap an arbitrary point to the nearest graph node.
 
@@ -140,19 +200,7 @@ def snap_to_graph(graph: nx.Graph, point: Mapping[str, object]) -> SnappedPoint:
     lat_f = float(lat)
     lon_f = float(lon)
 
-    coords: List[Dict[str, object]] = []
-    node_iter = graph.nodes(data=True) if callable(getattr(graph, "nodes", None)) else graph.nodes.items()  # type: ignore[attr-defined]
-    for node_id, data in node_iter:
-        node_lat = data.get("lat") or data.get("y")
-        node_lon = data.get("lon") or data.get("x")
-        if node_lat is None or node_lon is None:
-            continue
-        coords.append({"id": str(node_id), "lat": float(node_lat), "lon": float(node_lon)})
-
-    if not coords:
-        raise DistanceMatrixError("Graph nodes do not contain coordinate attributes")
-
-    index = SpatialIndex.from_iterable(coords, prefer_vectorised=False)
+    index = _graph_spatial_index(graph)
     result = index.nearest(lat_f, lon_f)
 
     point_id = str(point.get("id") or point.get("point_id") or result.node_id)
@@ -164,6 +212,102 @@ def snap_to_graph(graph: nx.Graph, point: Mapping[str, object]) -> SnappedPoint:
     )
 
 
+def _dijkstra_lengths_to_targets(
+    graph: nx.Graph, source: Hashable, targets: AbstractSet[Hashable], weight: str = "length"
+) -> Dict[Hashable, float]:
+    """Shortest path lengths from *source*, stopping once every target is settled.
+
+    Equivalent to ``nx.single_source_dijkstra_path_length`` restricted to
+    *targets*, but does not explore the rest of the graph.
+    """
+
+    if source not in graph:
+        raise nx.NodeNotFound(f"Source {source} is not in G")
+    adjacency = graph._succ if graph.is_directed() else graph._adj  # type: ignore[attr-defined]
+    multigraph = graph.is_multigraph()
+    remaining = set(targets)
+    settled: Dict[Hashable, float] = {}
+    tentative: Dict[Hashable, float] = {source: 0.0}
+    tie = count()
+    heap: List[Tuple[float, int, Hashable]] = [(0.0, next(tie), source)]
+
+    while heap and remaining:
+        dist, _, node = heapq.heappop(heap)
+        if node in settled:
+            continue
+        settled[node] = dist
+        remaining.discard(node)
+        for neighbour, data in adjacency[node].items():
+            if neighbour in settled:
+                continue
+            if multigraph:
+                cost = min(attrs.get(weight, 1) for attrs in data.values())
+            else:
+                cost = data.get(weight, 1)
+            candidate = dist + cost
+            if candidate < tentative.get(neighbour, float("inf")):
+                tentative[neighbour] = candidate
+                heapq.heappush(heap, (candidate, next(tie), neighbour))
+
+    return {node: settled[node] for node in targets if node in settled}
+
+
+# グラフ毎の CSR 隣接行列（グラフが破棄されれば自動的に消える）
+_CSR_CACHE: "weakref.WeakKeyDictionary[nx.Graph, Tuple[Tuple[int, int], object, Dict[Hashable, int]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _graph_csr(graph: nx.Graph, weight: str = "length") -> Tuple[object, Dict[Hashable, int]]:
+    """Return ``(csr, node -> row)`` for *graph*, built once per graph."""
+
+    stamp = (graph.number_of_nodes(), graph.number_of_edges())
+    cached = _CSR_CACHE.get(graph)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+    row_of: Dict[Hashable, int] = {node: idx for idx, node in enumerate(graph)}
+    if graph.is_multigraph():
+        # csr_matrix は重複要素を合計してしまうので、並行辺は最短のものだけ残す
+        shortest: Dict[Tuple[int, int], float] = {}
+        for u, v, length in graph.edges(data=weight, default=1):
+            key = (row_of[u], row_of[v])
+            length = float(length)
+            if length < shortest.get(key, float("inf")):
+                shortest[key] = length
+        rows = [r for r, _ in shortest]
+        cols = [c for _, c in shortest]
+        data = list(shortest.values())
+    else:
+        rows = []
+        cols = []
+        data = []
+        for u, v, length in graph.edges(data=weight, default=1):
+            rows.append(row_of[u])
+            cols.append(row_of[v])
+            data.append(float(length))
+    size = len(row_of)
+    # 明示的な 0 要素も csgraph では長さ 0 の辺として扱われる
+    csr = csr_matrix((data, (rows, cols)), shape=(size, size))
+    _CSR_CACHE[graph] = (stamp, csr, row_of)
+    return csr, row_of
+
+
+def _csgraph_distances(graph: nx.Graph, nodes: Sequence[Hashable]):
+    """Dense ``(len(nodes), len(nodes))`` shortest path lengths via ``scipy.sparse.csgraph``.
+
+    Unreachable pairs hold ``UNREACHABLE_COST``.
+    """
+
+    csr, row_of = _graph_csr(graph)
+    for node in nodes:
+        if node not in row_of:
+            raise nx.NodeNotFound(f"Node {node} is not in G")
+    rows = np.fromiter((row_of[node] for node in nodes), dtype=np.intp, count=len(nodes))
+    # indices=None（全点対）は V 回の探索になり、始点数がどれだけ多くても indices 指定より速くはならない
+    dist = csgraph_dijkstra(csr, directed=graph.is_directed(), indices=rows)[:, rows]
+    return np.where(np.isinf(dist), UNREACHABLE_COST, dist)
+
+
 def build_distance_matrix(graph: nx.Graph, points: Sequence[PointInput]) -> DistanceMatrix:
     """Construct a dense distance matrix for the supplied points."""
 
@@ -172,7 +316,6 @@ def build_distance_matrix(graph: nx.Graph, points: Sequence[PointInput]) -> Dist
         raise DistanceMatrixError("At least one point is required")
 
     n = len(snapped)
-    matrix = [[float(UNREACHABLE_COST) for _ in range(n)] for _ in range(n)]
     index_map: Dict[str, int] = {}
     node_lookup: Dict[str, Union[int, str]] = {}
     connector_offsets: Dict[str, float] = {}
@@ -181,15 +324,41 @@ def build_distance_matrix(graph: nx.Graph, points: Sequence[PointInput]) -> Dist
         index_map[sp.point_id] = idx
         node_lookup[sp.point_id] = sp.node_id
         connector_offsets[sp.point_id] = float(sp.connector_distance_m)
-        matrix[idx][idx] = 0.0
 
-    for idx, source in enumerate(snapped):
+    if csgraph_dijkstra is not None and np is not None:
+        # 地点ノードを重複なしで一括探索し、(地点 x 地点) に展開する
+        unique_pos: Dict[Hashable, int] = {}
+        for sp in snapped:
+            unique_pos.setdefault(sp.node_id, len(unique_pos))
         try:
-            lengths = nx.single_source_dijkstra_path_length(
-                graph, source.node_id, weight="length"
-            )
-        except (nx.NetworkXNoPath, nx.NodeNotFound) as exc:
+            block = _csgraph_distances(graph, list(unique_pos))
+        except nx.NodeNotFound as exc:
             raise DistanceMatrixError(str(exc)) from exc
+        pos = np.fromiter((unique_pos[sp.node_id] for sp in snapped), dtype=np.intp, count=n)
+        return DistanceMatrix(
+            matrix=np.ascontiguousarray(block[np.ix_(pos, pos)]),
+            index_map=index_map,
+            node_lookup=node_lookup,
+            connector_offsets=connector_offsets,
+        )
+
+    matrix: MatrixLike
+    if np is not None:
+        matrix = np.full((n, n), UNREACHABLE_COST, dtype=np.float64)
+    else:
+        matrix = [[float(UNREACHABLE_COST) for _ in range(n)] for _ in range(n)]
+
+    # 必要なのは地点ノード間の距離だけなので、全ノードを探索せず目的ノードが確定した時点で打ち切る
+    target_nodes = {sp.node_id for sp in snapped}
+    lengths_by_source: Dict[Union[int, str], Dict[Hashable, float]] = {}
+    for idx, source in enumerate(snapped):
+        lengths = lengths_by_source.get(source.node_id)
+        if lengths is None:
+            try:
+                lengths = _dijkstra_lengths_to_targets(graph, source.node_id, target_nodes, weight="length")
+            except (nx.NetworkXNoPath, nx.NodeNotFound) as exc:
+                raise DistanceMatrixError(str(exc)) from exc
+            lengths_by_source[source.node_id] = lengths
 
         for jdx, target in enumerate(snapped):
             if target.node_id == source.node_id:
@@ -7,6 +7,8 @@ eCOM-10（低速電動コミュニティバス）を使用した資源回収の
 
 from __future__ import annotations
 
+from bisect import bisect_left
+from functools import cached_property
 from typing import Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 
@@ -31,14 +33,29 @@ ECOM10_MAX_SPEED_KMH = 19  # 最高速度
 ECOM10_ENERGY_CONSUMPTION_KWH_PER_KM = 0.5  # エネルギー消費
 
 
+# 警告の元データ: (資源種別, 量, 非適合理由, 回収地点ID)。資源種別が空なら種別未設定の警告
+WarningDetail = Tuple[str, int, str, object]
+
+
 @dataclass(frozen=True)
 class eCOM10CompatibilityResult:
     """eCOM-10互換性チェック結果"""
     compatible_pickups: List[Dict[str, object]]
     incompatible_pickups: List[Dict[str, object]]
-    warnings: List[str]
+    warning_details: List[WarningDetail]
     total_compatible_weight: int
 
+    @cached_property
+    def warnings(self) -> List[str]:
+        # 警告文は表示・解なし時にしか使われないので、参照された時に初めて組み立てる
+        return [_format_warning(*detail) for detail in self.warning_details]
+
+
+def _format_warning(resource_type: str, quantity: int, reason: str, pickup_id: object) -> str:
+    if not resource_type:
+        return f"⚠️ 回収地点 {pickup_id} に資源種別が設定されていません"
+    return f"❌ **{resource_type}** ({quantity}kg) は eCOM-10 では運搬できません\n   理由: {reason}"
+
 
 def check_ecom10_compatibility(
     pickup_inputs: Sequence[PickupInput],
@@ -56,7 +73,7 @@ def check_ecom10_compatibility(
     """
     compatible_pickups: List[Dict[str, object]] = []
     incompatible_pickups: List[Dict[str, object]] = []
-    warnings: List[str] = []
+    warning_details: List[WarningDetail] = []
     total_compatible_weight = 0
 
     # マスタデータから eCOM-10 の互換性情報を取得
@@ -64,49 +81,46 @@ def check_ecom10_compatibility(
     if master and master.compatibility:
         ecom10_compatibility = master.compatibility.get("eCOM-10")
 
+    # 資源種別ごとの判定結果（None=適合、文字列=非適合理由）。同じ種別の地点が多いので一度だけ判定する
+    verdicts: Dict[str, Optional[str]] = {}
+
+    def _verdict(resource_type: str) -> Optional[str]:
+        if not ecom10_compatibility:
+            return "互換性情報なし"
+        support_status = ecom10_compatibility.supports.get(resource_type)
+        if support_status is True:
+            return None
+        if support_status is False:
+            # 非適合理由を取得
+            return ecom10_compatibility.requirements.get(resource_type) or "車両構造上不適合"
+        return "互換性情報なし"
+
     for pickup in pickup_inputs:
         resource_type = str(pickup.get("kind", ""))
         quantity = int(pickup.get("qty", 0))
-        pickup_id = pickup.get("id", "不明")
 
         if not resource_type:
-            warnings.append(f"⚠️ 回収地点 {pickup_id} に資源種別が設定されていません")
+            warning_details.append(("", quantity, "", pickup.get("id", "不明")))
             incompatible_pickups.append(pickup)
             continue
 
-        # 互換性チェック
-        is_compatible = False
-        incompatible_reason = "互換性情報なし"
-
-        if ecom10_compatibility:
-            support_status = ecom10_compatibility.supports.get(resource_type)
-
-            if support_status is True:
-                is_compatible = True
-            elif support_status is False:
-                is_compatible = False
-                # 非適合理由を取得
-                reason = ecom10_compatibility.requirements.get(resource_type)
-                if reason:
-                    incompatible_reason = reason
-                else:
-                    incompatible_reason = "車両構造上不適合"
+        if resource_type in verdicts:
+            incompatible_reason = verdicts[resource_type]
+        else:
+            incompatible_reason = verdicts[resource_type] = _verdict(resource_type)
 
         # 判定結果に基づいて分類
-        if is_compatible:
+        if incompatible_reason is None:
             compatible_pickups.append(pickup)
             total_compatible_weight += quantity
         else:
             incompatible_pickups.append(pickup)
-            warnings.append(
-                f"❌ **{resource_type}** ({quantity}kg) は eCOM-10 では運搬できません\n"
-                f"   理由: {incompatible_reason}"
-            )
+            warning_details.append((resource_type, quantity, incompatible_reason, None))
 
     return eCOM10CompatibilityResult(
         compatible_pickups=compatible_pickups,
         incompatible_pickups=incompatible_pickups,
-        warnings=warnings,
+        warning_details=warning_details,
         total_compatible_weight=total_compatible_weight,
     )
 
@@ -271,27 +285,48 @@ def find_alternative_vehicles(
     Returns:
         代替車両名のリスト
     """
-    alternatives = []
-
     if not master or not master.vehicles:
         return ["適合車両なし"]
 
-    for vehicle in master.vehicles:
+    capacities, entries = _alternative_vehicle_index(master).get(resource_type, ((), ()))
+    # 容量が足りる車両だけを切り出し、マスタの並び順に戻して返す
+    alternatives = [name for _, name in sorted(entries[bisect_left(capacities, quantity):])]
+    return alternatives if alternatives else ["適合車両なし"]
+
+
+# 資源種別 -> (容量の昇順リスト, (マスタ内の位置, 車両名) のリスト)
+AlternativeIndex = Dict[str, Tuple[List[float], List[Tuple[int, str]]]]
+
+_ALTERNATIVE_INDEX_CACHE: Dict[int, Tuple[ProcessedMasterData, AlternativeIndex]] = {}
+_ALTERNATIVE_INDEX_CACHE_MAXSIZE = 8
+
+
+def _alternative_vehicle_index(master: ProcessedMasterData) -> AlternativeIndex:
+    # ProcessedMasterData は辞書を含みハッシュ不可のため id で引き、同一オブジェクトか確認する
+    cached = _ALTERNATIVE_INDEX_CACHE.get(id(master))
+    if cached is not None and cached[0] is master:
+        return cached[1]
+
+    rows: Dict[str, List[Tuple[float, int, str]]] = {}
+    for position, vehicle in enumerate(master.vehicles):
         if not vehicle.name or not vehicle.capacity_kg:
             continue
-
         # eCOM-10は除外
         if vehicle.name == "eCOM-10":
             continue
-
         compatibility = master.compatibility.get(vehicle.name)
         if not compatibility:
             continue
-
-        # 互換性チェック
-        if compatibility.supports.get(resource_type) == True:
-            # 容量チェック
-            if vehicle.capacity_kg >= quantity:
-                alternatives.append(vehicle.name)
-
-    return alternatives if alternatives else ["適合車両なし"]
+        for resource, status in compatibility.supports.items():
+            if status == True:
+                rows.setdefault(resource, []).append((vehicle.capacity_kg, position, vehicle.name))
+
+    index: AlternativeIndex = {}
+    for resource, items in rows.items():
+        items.sort()
+        index[resource] = ([capacity for capacity, _, _ in items], [(position, name) for _, position, name in items])
+
+    if len(_ALTERNATIVE_INDEX_CACHE) >= _ALTERNATIVE_INDEX_CACHE_MAXSIZE:
+        _ALTERNATIVE_INDEX_CACHE.clear()
+    _ALTERNATIVE_INDEX_CACHE[id(master)] = (master, index)
+    return index
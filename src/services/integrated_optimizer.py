@@ -23,6 +23,7 @@ from collections import defaultdict
 from dataclasses import dataclass
 from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
+from ._compat import _DATACLASS_SLOTS
 from .distance_matrix import DistanceMatrix, UNREACHABLE_COST
 from .master_repository import ProcessedMasterData, VehicleCandidate
 from .optimizer import (
@@ -32,6 +33,7 @@ from .optimizer import (
     PickupInput,
     Solution,
     VehicleRoute,
+    _prepare_indices,
     solve_path_routing,
 )
 from .vehicle_catalog import VehicleType
@@ -44,11 +46,16 @@ try:  # pragma: no cover - optional dependency
 except ModuleNotFoundError:  # pragma: no cover
     ORTOOLS_AVAILABLE = False
 
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
 
 _COST_CALCULATOR = CostCalculator()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class TripRoute:
     """A single 'trip' (depot/sink -> pickups -> sink) before physical-vehicle chaining."""
 
@@ -59,7 +66,7 @@ class TripRoute:
     cost_breakdown: Dict[str, float]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class IntegratedFleetSolution:
     """Result that keeps FleetSolution compatibility + trip-level details."""
 
@@ -85,22 +92,46 @@ def _vehicle_supports_resource(
     return bool(status is True)
 
 
+def _arc_cost_rows(matrix, demands: Sequence[int], rate: float, node_rate: float) -> List[List[int]]:
+    """Integer arc costs ``round(distance * rate + demand[to] * node_rate)`` for every node pair."""
+
+    unreachable = int(UNREACHABLE_COST)
+    # 積込コストは到着ノードだけで決まるので、ノードごとに一度だけ計算する
+    if np is not None:
+        node_cost = np.asarray(demands, dtype=float) * node_rate
+        dist = np.asarray(matrix, dtype=float)
+        costs = np.rint(dist * rate + node_cost[None, :])
+        costs[dist >= UNREACHABLE_COST] = unreachable
+        return costs.astype(np.int64).tolist()
+    node_costs = [demand * node_rate for demand in demands]
+    return [
+        [unreachable if d >= UNREACHABLE_COST else int(round(d * rate + node)) for d, node in zip(row, node_costs)]
+        for row in matrix
+    ]
+
+
+def _sum_breakdowns(routes: Sequence[VehicleRoute]) -> Dict[str, float]:
+    totals: Dict[str, float] = defaultdict(float)
+    for r in routes:
+        for k, v in r.solution.cost_breakdown.items():
+            totals[k] += float(v)
+    totals.setdefault("fixed_cost", 0.0)
+    totals.setdefault("distance_cost", 0.0)
+    totals["total_cost"] = totals["fixed_cost"] + totals["distance_cost"]
+    return dict(totals)
+
+
 def _normalise_pickups(pickup_inputs: Sequence[PickupInput]) -> List[Dict[str, object]]:
     payload: List[Dict[str, object]] = []
+    append = payload.append
     for entry in pickup_inputs:
         point_id = entry.get("id")
         if not point_id:
             raise ValueError("Pickup requires an 'id'")
-        qty = entry.get("qty", entry.get("demand", 0))
-        kind = entry.get("kind", "")
-        payload.append(
-            {
-                "id": str(point_id),
-                "qty": int(qty or 0),
-                "demand": int(qty or 0),
-                "kind": str(kind or ""),
-            }
-        )
+        # "qty" が存在する場合は値が 0/None でも "demand" にはフォールバックしない（従来どおり）
+        qty = entry["qty"] if "qty" in entry else entry.get("demand", 0)
+        quantity = int(qty or 0)
+        append({"id": str(point_id), "qty": quantity, "demand": quantity, "kind": str(entry.get("kind", "") or "")})
     return payload
 
 
@@ -151,7 +182,8 @@ def _extract_used_routes(
         route_indices.append(node)
 
         order = [point_ids_by_index[i] for i in route_indices]
-        pickup_ids = [pid for pid in order if pid not in {order[0], order[-1]}]
+        first, last = order[0], order[-1]
+        pickup_ids = [pid for pid in order if pid != first and pid != last]
         if not pickup_ids:
             continue
         vehicle = vehicles[v]
@@ -170,13 +202,6 @@ def _extract_used_routes(
     return trips
 
 
-def _prepare_indices(distance_matrix: DistanceMatrix) -> Tuple[List[str], Dict[str, int]]:
-    ordered: List[str] = [None] * len(distance_matrix.index_map)
-    for point_id, idx in distance_matrix.index_map.items():
-        ordered[idx] = point_id
-    return ordered, distance_matrix.index_map
-
-
 def _solve_stage_a_trips(
     distance_matrix: DistanceMatrix,
     depot: str,
@@ -210,9 +235,13 @@ def _solve_stage_a_trips(
         pickup_kinds[idx] = kind
 
     # Validate compatibility coverage for each pickup.
+    # 対応車両は資源種別だけで決まるので、種別ごとに一度だけ求めて制約設定でも使い回す
+    allowed_by_kind: Dict[str, List[int]] = {}
     for idx in pickup_indices:
         kind = pickup_kinds.get(idx, "")
-        allowed = [v for v in vehicles if _vehicle_supports_resource(v.name, kind, master)]
+        allowed = allowed_by_kind.get(kind)
+        if allowed is None:
+            allowed = allowed_by_kind[kind] = [i for i, v in enumerate(vehicles) if _vehicle_supports_resource(v.name, kind, master)]
         if not allowed:
             return NoSolution(NoSolutionReason.INFEASIBLE, f"資源[{kind}]に対応できる車両がありません。")
 
@@ -236,19 +265,17 @@ def _solve_stage_a_trips(
 
         yen_per_m = (float(vehicle.fixed_cost_per_km) + float(vehicle.per_km_cost) + float(driver_per_km)) / 1000.0
 
-        def _mk_cb(rate: float, node_rate: float):
+        # 探索中に何百万回も呼ばれるため、車両ごとの整数コスト表を事前に作り参照だけにする
+        def _mk_cb(cost_rows: List[List[int]]):
+            index_to_node = manager.IndexToNode
+
             def _cb(from_index: int, to_index: int) -> int:
-                from_node = manager.IndexToNode(from_index)
-                to_node = manager.IndexToNode(to_index)
-                distance = distance_matrix.matrix[from_node][to_node]
-                if distance >= UNREACHABLE_COST:
-                    return int(UNREACHABLE_COST)
-                demand_to = int(demands[to_node]) if 0 <= to_node < len(demands) else 0
-                return int(round(distance * rate + demand_to * node_rate))
+                return cost_rows[index_to_node(from_index)][index_to_node(to_index)]
 
             return _cb
 
-        cb_idx = routing.RegisterTransitCallback(_mk_cb(yen_per_m, work_yen_per_kg))
+        cost_rows = _arc_cost_rows(distance_matrix.matrix, demands, yen_per_m, work_yen_per_kg)
+        cb_idx = routing.RegisterTransitCallback(_mk_cb(cost_rows))
         callback_indices.append(cb_idx)
 
     for v, cb_idx in enumerate(callback_indices):
@@ -270,7 +297,7 @@ def _solve_stage_a_trips(
     # Compatibility: restrict allowed vehicles per pickup.
     for pickup_idx in pickup_indices:
         kind = pickup_kinds.get(pickup_idx, "")
-        allowed_vehicle_ids = [i for i, v in enumerate(vehicles) if _vehicle_supports_resource(v.name, kind, master)]
+        allowed_vehicle_ids = allowed_by_kind[kind]
         if allowed_vehicle_ids:
             routing.SetAllowedVehiclesForIndex(allowed_vehicle_ids, manager.NodeToIndex(pickup_idx))
 
@@ -358,36 +385,28 @@ def solve_integrated_routing(
         return NoSolution(NoSolutionReason.INFEASIBLE, "解が見つかりませんでした。")
 
     # Stage B: fit trips into <= max_physical_vehicles by merging at most one pair (5->4).
-    return_leg = distance_matrix.distance(sink, depot)
+    return_leg = float(distance_matrix.distance(sink, depot))
     if return_leg >= UNREACHABLE_COST:
         return NoSolution(NoSolutionReason.DISCONNECTED, "集積場所から車庫へ戻れません。")
 
-    # Precompute pickup lookup (qty/kind).
-    pickup_lookup: Dict[str, Dict[str, object]] = {str(p["id"]): dict(p) for p in pickups}
-
-    def trip_demand(trip: TripRoute) -> int:
-        return int(sum(int(pickup_lookup[pid].get("qty") or 0) for pid in trip.pickup_ids if pid in pickup_lookup))
-
-    def trip_pickups_payload(trip: TripRoute) -> List[Dict[str, object]]:
-        return [{"id": pid, "demand": int(pickup_lookup.get(pid, {}).get("qty") or 0)} for pid in trip.pickup_ids]
-
-    def trip_kinds(trip: TripRoute) -> List[str]:
-        return [str(pickup_lookup.get(pid, {}).get("kind") or "") for pid in trip.pickup_ids]
-
-    def vehicle_can_cover_trip(vehicle: VehicleType, trip: TripRoute) -> bool:
-        if vehicle.capacity_kg < trip_demand(trip):
-            return False
-        kinds = trip_kinds(trip)
-        return all(_vehicle_supports_resource(vehicle.name, k, master) for k in kinds if k)
-
-    def make_physical_route(vehicle: VehicleType, order: List[str], distance_m: float, pickup_ids: List[str]) -> VehicleRoute:
+    # Precompute pickup lookup (qty/kind) and per-trip demand / kinds once.
+    qty_by_id: Dict[str, int] = {str(p["id"]): int(p.get("qty") or 0) for p in pickups}
+    kind_by_id: Dict[str, str] = {str(p["id"]): str(p.get("kind") or "") for p in pickups}
+    trip_demands: List[int] = [sum(qty_by_id.get(pid, 0) for pid in trip.pickup_ids) for trip in trips]
+    trip_kinds: List[set[str]] = [{kind_by_id[pid] for pid in trip.pickup_ids if kind_by_id.get(pid)} for trip in trips]
+    trip_payloads: List[List[Dict[str, object]]] = [
+        [{"id": pid, "demand": qty_by_id.get(pid, 0)} for pid in trip.pickup_ids] for trip in trips
+    ]
+
+    def make_physical_route(
+        vehicle: VehicleType, order: List[str], distance_m: float, pickup_ids: List[str], total_demand: int
+    ) -> VehicleRoute:
         full_order = list(order)
         if full_order[-1] != sink:
             # Defensive: enforce ending at sink before returning to depot
             full_order.append(sink)
         full_order.append(depot)
-        total_distance = float(distance_m) + float(return_leg)
-        total_demand = int(sum(int(pickup_lookup.get(pid, {}).get("qty") or 0) for pid in pickup_ids))
+        total_distance = float(distance_m) + return_leg
         breakdown = _evaluate_cost(vehicle, total_distance, vehicle_metadata_map, total_demand_kg=total_demand)
         return VehicleRoute(
             vehicle=vehicle,
@@ -396,17 +415,11 @@ def solve_integrated_routing(
         )
 
     if len(trips) <= max_physical_vehicles:
-        routes: List[VehicleRoute] = []
-        totals: Dict[str, float] = defaultdict(float)
-        for trip in trips:
-            routes.append(make_physical_route(trip.vehicle, trip.order, trip.total_distance_m, trip.pickup_ids))
-        for r in routes:
-            for k, v in r.solution.cost_breakdown.items():
-                totals[k] += float(v)
-        totals.setdefault("fixed_cost", 0.0)
-        totals.setdefault("distance_cost", 0.0)
-        totals["total_cost"] = totals["fixed_cost"] + totals["distance_cost"]
-        fleet = FleetSolution(routes=routes, cost_breakdown=dict(totals))
+        routes: List[VehicleRoute] = [
+            make_physical_route(trip.vehicle, trip.order, trip.total_distance_m, trip.pickup_ids, demand)
+            for trip, demand in zip(trips, trip_demands)
+        ]
+        fleet = FleetSolution(routes=routes, cost_breakdown=_sum_breakdowns(routes))
         return IntegratedFleetSolution(fleet=fleet, trips=trips, vehicle_count=len(routes), trip_count=len(trips))
 
     if len(trips) != max_physical_vehicles + 1:
@@ -418,43 +431,89 @@ def solve_integrated_routing(
     # Try merging any pair; choose minimal total cost.
     best: Optional[IntegratedFleetSolution] = None
 
+    # 車種 x 便 の積載・適合可否と、マージしない便の物理ルートは組合せに依らないので先に求めておく。
+    # 安い車種から試して早めに良い解を得ると下界による枝刈りが効きやすいので、車種は km 単価順に並べ、
+    # 便ごとに対応可能な車種をビット集合で持つ（便の組の候補はビット積で求まる）
+    ranked_vehicles = sorted(vehicle_types, key=lambda v: float(v.fixed_cost_per_km) + float(v.per_km_cost))
+    cover_masks: List[int] = [
+        sum(
+            1 << rank
+            for rank, vehicle in enumerate(ranked_vehicles)
+            if vehicle.capacity_kg >= demand and all(_vehicle_supports_resource(vehicle.name, k, master) for k in kinds)
+        )
+        for demand, kinds in zip(trip_demands, trip_kinds)
+    ]
+    trip_routes: List[VehicleRoute] = [
+        make_physical_route(t.vehicle, t.order, t.total_distance_m, t.pickup_ids, demand) for t, demand in zip(trips, trip_demands)
+    ]
+    trip_route_costs = [float(route.solution.cost_breakdown.get("total_cost", 0.0)) for route in trip_routes]
+
+    # 経路距離の下界: 各回収地点を1つ経由するだけの距離（最短路距離は三角不等式を満たす）。
+    # OR-Tools の solve_path_routing は接続距離を含まない行列値を合計するため、下界も同じ行列値で評価する
+    # （接続距離込みの distance() で測ると実際の経路距離を上回り、良いマージを枝刈りしてしまう）。
+    raw = distance_matrix.matrix
+    index_of = distance_matrix.index_map
+    sink_idx = index_of[sink]
+
+    def via_lower_bound(start: str, pickup_ids: List[str]) -> float:
+        start_idx = index_of[start]
+        direct = float(raw[start_idx][sink_idx]) if start_idx != sink_idx else 0.0
+        return max([direct] + [float(raw[start_idx][index_of[pid]]) + float(raw[index_of[pid]][sink_idx]) for pid in pickup_ids])
+
+    first_leg_lb = [via_lower_bound(depot, trip.pickup_ids) for trip in trips]
+    second_leg_lb = [via_lower_bound(sink, trip.pickup_ids) for trip in trips]
+    # 便 k を車両で start -> sink に解いた結果。A 側は j、B 側は i が変わっても同じ入力になるので使い回す
+    path_cache: Dict[Tuple[int, str, int], Union[Solution, NoSolution]] = {}
+
+    def solve_leg(k: int, start: str, vehicle: VehicleType) -> Union[Solution, NoSolution]:
+        key = (k, start, id(vehicle))
+        sol = path_cache.get(key)
+        if sol is None:
+            sol = path_cache[key] = solve_path_routing(distance_matrix, trip_payloads[k], start, sink, vehicle, vehicle_metadata_map)
+        return sol
+
     for i in range(len(trips)):
         for j in range(i + 1, len(trips)):
-            other = [t for k, t in enumerate(trips) if k not in {i, j}]
-            trip_a, trip_b = trips[i], trips[j]
-
-            candidates = [v for v in vehicle_types if vehicle_can_cover_trip(v, trip_a) and vehicle_can_cover_trip(v, trip_b)]
-            if not candidates:
+            shared = cover_masks[i] & cover_masks[j]
+            if not shared:
                 continue
+            candidates = [vehicle for rank, vehicle in enumerate(ranked_vehicles) if shared >> rank & 1]
+            other_routes = [route for k, route in enumerate(trip_routes) if k != i and k != j]
+            trip_a, trip_b = trips[i], trips[j]
+            other_cost = sum(cost for k, cost in enumerate(trip_route_costs) if k != i and k != j)
+            merged_distance_lb = first_leg_lb[i] + second_leg_lb[j] + return_leg
 
             for vehicle in candidates:
+                if best is not None:
+                    # コストは距離に対して単調なので、下界距離でのコストが現在の最良以上なら経路探索を省く
+                    lower = _evaluate_cost(
+                        vehicle, merged_distance_lb, vehicle_metadata_map, total_demand_kg=trip_demands[i] + trip_demands[j]
+                    )
+                    if float(lower["total_cost"]) + other_cost >= best.fleet.cost:
+                        continue
                 # Re-optimise A: depot -> ... -> sink
-                sol_a = solve_path_routing(distance_matrix, trip_pickups_payload(trip_a), depot, sink, vehicle, vehicle_metadata_map)
+                sol_a = solve_leg(i, depot, vehicle)
                 if isinstance(sol_a, NoSolution):
                     continue
                 # Re-optimise B: sink -> ... -> sink (2nd trip after unloading)
-                sol_b = solve_path_routing(distance_matrix, trip_pickups_payload(trip_b), sink, sink, vehicle, vehicle_metadata_map)
+                sol_b = solve_leg(j, sink, vehicle)
                 if isinstance(sol_b, NoSolution):
                     continue
 
                 merged_distance = float(sol_a.total_distance_m) + float(sol_b.total_distance_m)
                 merged_order = list(sol_a.order) + list(sol_b.order[1:])  # avoid duplicate sink
                 merged_pickups = list(trip_a.pickup_ids) + list(trip_b.pickup_ids)
-                merged_route = make_physical_route(vehicle, merged_order, merged_distance, merged_pickups)
-
-                routes: List[VehicleRoute] = [merged_route] + [make_physical_route(t.vehicle, t.order, t.total_distance_m, t.pickup_ids) for t in other]
-                totals: Dict[str, float] = defaultdict(float)
-                for r in routes:
-                    for k, v in r.solution.cost_breakdown.items():
-                        totals[k] += float(v)
-                totals.setdefault("fixed_cost", 0.0)
-                totals.setdefault("distance_cost", 0.0)
-                totals["total_cost"] = totals["fixed_cost"] + totals["distance_cost"]
-                fleet = FleetSolution(routes=routes, cost_breakdown=dict(totals))
-                cand = IntegratedFleetSolution(fleet=fleet, trips=trips, vehicle_count=len(routes), trip_count=len(trips))
-
-                if best is None or cand.fleet.cost < best.fleet.cost:
-                    best = cand
+                merged_route = make_physical_route(
+                    vehicle, merged_order, merged_distance, merged_pickups, trip_demands[i] + trip_demands[j]
+                )
+
+                # 各便の費用は整数円なので、合計は他便の合計との和で正確に求まる。集計は最良を更新する時だけ行う
+                fleet_cost = float(merged_route.solution.cost_breakdown.get("total_cost", 0.0)) + other_cost
+                if best is not None and fleet_cost >= best.fleet.cost:
+                    continue
+                routes: List[VehicleRoute] = [merged_route] + other_routes
+                fleet = FleetSolution(routes=routes, cost_breakdown=_sum_breakdowns(routes))
+                best = IntegratedFleetSolution(fleet=fleet, trips=trips, vehicle_count=len(routes), trip_count=len(trips))
 
     if best is None:
         return NoSolution(NoSolutionReason.INFEASIBLE, "4台以内にまとめられませんでした。")
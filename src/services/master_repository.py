@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import json
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from ._compat import _DATACLASS_SLOTS
 
 
 # 燃料エネルギー密度定数（kWh/L）
@@ -16,8 +19,13 @@ FUEL_ENERGY_DENSITY_KWH_PER_L = {
     "電気": 1.0,       # 電気の場合は直接kWhで指定
 }
 
+# (base_dir, 各 JSON の mtime_ns) -> 読込結果
+_PROCESSED_FILES = ("vehicles.json", "compatibility.json", "resources.json", "supplement.json")
+_PROCESSED_CACHE: Dict[Tuple[Path, Tuple[int, ...]], ProcessedMasterData] = {}
+_PROCESSED_CACHE_LOCK = threading.Lock()
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class VehicleCandidate:
     name: str
     capacity_kg: Optional[float]
@@ -45,7 +53,7 @@ class VehicleCandidate:
     residual_value_rate: Optional[float] = 0.0
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ResourceInfo:
     name: str
     constraint_type: Optional[str]
@@ -59,19 +67,19 @@ class ResourceInfo:
     notes: Optional[str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class CompatibilityInfoRecord:
     supports: Dict[str, Optional[bool]]
     requirements: Dict[str, Optional[str]]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class SupplementInfo:
     categories: Dict[str, List[Dict[str, Any]]]
     notes: List[Dict[str, Any]]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ProcessedMasterData:
     vehicles: List[VehicleCandidate]
     compatibility: Dict[str, CompatibilityInfoRecord]
@@ -88,6 +96,8 @@ def _load_vehicles(path: Path) -> List[VehicleCandidate]:
     payload = _load_json(path)
     items = payload.get("vehicles", [])
     vehicles: List[VehicleCandidate] = []
+    append = vehicles.append
+    density_of = FUEL_ENERGY_DENSITY_KWH_PER_L.get
     for entry in items:
         # エネルギー消費量の計算または取得
         energy_kwh_per_km = entry.get("energy_consumption_kwh_per_km")
@@ -97,7 +107,7 @@ def _load_vehicles(path: Path) -> List[VehicleCandidate]:
             fuel_efficiency = entry.get("fuel_efficiency_km_per_l")
             if fuel_type and fuel_efficiency and fuel_efficiency > 0:
                 fuel_l_per_km = 1.0 / fuel_efficiency
-                energy_density = FUEL_ENERGY_DENSITY_KWH_PER_L.get(fuel_type, 0)
+                energy_density = density_of(fuel_type, 0)
                 energy_kwh_per_km = fuel_l_per_km * energy_density
             else:
                 energy_kwh_per_km = 0.0
@@ -114,7 +124,7 @@ def _load_vehicles(path: Path) -> List[VehicleCandidate]:
         useful_life_years = entry.get("useful_life_years")
         residual_value_rate = entry.get("residual_value_rate", 0.0)
 
-        vehicles.append(
+        append(
             VehicleCandidate(
                 name=entry.get("name"),
                 capacity_kg=entry.get("capacity_kg"),
@@ -184,16 +194,30 @@ def _load_supplement(path: Path) -> SupplementInfo:
 
 
 def load_processed_master(base_dir: Path) -> ProcessedMasterData:
-    vehicles = _load_vehicles(base_dir / "vehicles.json")
-    compatibility = _load_compatibility(base_dir / "compatibility.json")
-    resources = _load_resources(base_dir / "resources.json")
-    supplement = _load_supplement(base_dir / "supplement.json")
-    return ProcessedMasterData(
-        vehicles=vehicles,
-        compatibility=compatibility,
-        resources=resources,
-        supplement=supplement,
-    )
+    """Load the processed JSON artefacts, reusing the previous result while none of them changed.
+
+    Every caller gets the same ``ProcessedMasterData`` instance; its lists and dicts are
+    shared and must be treated as read-only.
+    """
+
+    paths = tuple(base_dir / name for name in _PROCESSED_FILES)
+    key = (base_dir.resolve(), tuple(path.stat().st_mtime_ns for path in paths))
+    with _PROCESSED_CACHE_LOCK:
+        cached = _PROCESSED_CACHE.get(key)
+        if cached is not None:
+            return cached
+        vehicles_path, compatibility_path, resources_path, supplement_path = paths
+        master = ProcessedMasterData(
+            vehicles=_load_vehicles(vehicles_path),
+            compatibility=_load_compatibility(compatibility_path),
+            resources=_load_resources(resources_path),
+            supplement=_load_supplement(supplement_path),
+        )
+        # 同じディレクトリの古い版は再利用されないので捨てる
+        for stale in [k for k in _PROCESSED_CACHE if k[0] == key[0]]:
+            del _PROCESSED_CACHE[stale]
+        _PROCESSED_CACHE[key] = master
+        return master
 
 
 __all__ = [
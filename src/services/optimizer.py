@@ -5,6 +5,7 @@ from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
+from operator import eq
 from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
 from .distance_matrix import DistanceMatrix, UNREACHABLE_COST
@@ -351,10 +352,14 @@ def _solve_simple(
 
 
 def _prepare_indices(distance_matrix: DistanceMatrix) -> Tuple[List[str], Dict[str, int]]:
-    ordered: List[str] = [None] * len(distance_matrix.index_map)
-    for point_id, idx in distance_matrix.index_map.items():
+    index_map = distance_matrix.index_map
+    # build_distance_matrix は 0 から順に番号を振るので、通常はキーの並びがそのまま添字順になる
+    ordered: List[str] = list(index_map)
+    if all(map(eq, index_map.values(), range(len(ordered)))):
+        return ordered, index_map
+    for point_id, idx in index_map.items():
         ordered[idx] = point_id
-    return ordered, distance_matrix.index_map
+    return ordered, index_map
 
 
 def _solve_with_ortools(
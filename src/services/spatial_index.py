@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Iterable, List, Mapping, MutableSequence, Optional, Sequence, Tuple
+from typing import AbstractSet, Dict, Iterable, List, Mapping, MutableSequence, Optional, Sequence, Tuple
 
 try:  # Optional dependency used for vectorised fallback
     import numpy as np  # type: ignore
@@ -16,6 +16,30 @@ RAD = math.pi / 180.0
 
 NodeCoord = Mapping[str, object]
 
+# Morton (Z-order) キーの量子化ビット数（緯度・経度それぞれ）
+MORTON_BITS = 16
+MORTON_MAX = (1 << MORTON_BITS) - 1
+# これ未満のノード数では索引を使わず全件ベクトル走査の方が速い
+BRUTE_FORCE_MAX_NODES = 4000
+
+
+def _part1by1(value):
+    """Spread the low 16 bits of *value* to the even bit positions (SWAR).
+
+    Works for Python ints and NumPy unsigned integer arrays alike.
+    """
+
+    value = value & 0x0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F
+    value = (value | (value << 2)) & 0x33333333
+    value = (value | (value << 1)) & 0x55555555
+    return value
+
+
+def _morton(qlat, qlon):
+    return _part1by1(qlon) | (_part1by1(qlat) << 1)
+
 
 def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     lat1_rad = lat1 * RAD
@@ -51,36 +75,79 @@ class SpatialIndex:
     ) -> None:
         if not node_coords:
             raise ValueError("SpatialIndex requires at least one coordinate")
-        self._cell_size = float(cell_size)
-        self._max_radius = int(max(1, max_radius))
-        self._node_ids: List[str] = []
-        self._lats: List[float] = []
-        self._lons: List[float] = []
-        self._buckets: dict[Tuple[int, int], List[int]] = {}
-
+        node_ids: List[str] = []
+        lats: List[float] = []
+        lons: List[float] = []
         for idx, entry in enumerate(node_coords):
             try:
-                lat = float(entry["lat"])  # type: ignore[index]
-                lon = float(entry["lon"])  # type: ignore[index]
+                lats.append(float(entry["lat"]))  # type: ignore[index]
+                lons.append(float(entry["lon"]))  # type: ignore[index]
             except KeyError as exc:  # pragma: no cover - defensive
                 raise KeyError("Node coordinate requires 'lat' and 'lon'") from exc
-            node_id = str(entry.get("id") or entry.get("node_id") or idx)
-            self._node_ids.append(node_id)
-            self._lats.append(lat)
-            self._lons.append(lon)
-            cell = self._cell_key(lat, lon)
+            node_ids.append(str(entry.get("id") or entry.get("node_id") or idx))
+        self._build(node_ids, lats, lons, cell_size, max_radius, prefer_vectorised)
+
+    def _build(
+        self,
+        node_ids: List[str],
+        lats: Sequence[float],
+        lons: Sequence[float],
+        cell_size: float,
+        max_radius: int,
+        prefer_vectorised: bool,
+    ) -> None:
+        self._cell_size = float(cell_size)
+        self._max_radius = int(max(1, max_radius))
+        self._node_ids = node_ids
+        self._index_of: Dict[str, int] = {}
+        self._lats: List[float] = [float(lat) for lat in lats]
+        self._lons: List[float] = [float(lon) for lon in lons]
+        self._buckets: dict[Tuple[int, int], List[int]] = {}
+
+        for idx, node_id in enumerate(node_ids):
+            self._index_of.setdefault(node_id, idx)
+            cell = self._cell_key(self._lats[idx], self._lons[idx])
             self._buckets.setdefault(cell, []).append(idx)
 
         self._vector_enabled = bool(prefer_vectorised and np is not None)
         if self._vector_enabled:
-            self._lat_array = np.array(self._lats) * RAD  # type: ignore[assignment]
-            self._lon_array = np.array(self._lons) * RAD  # type: ignore[assignment]
+            self._lat_array = np.asarray(lats, dtype=float) * RAD  # type: ignore[assignment]
+            self._lon_array = np.asarray(lons, dtype=float) * RAD  # type: ignore[assignment]
             self._cos_lat_array = np.cos(self._lat_array)  # type: ignore[assignment]
+            self._use_morton = len(node_ids) >= BRUTE_FORCE_MAX_NODES
+            if self._use_morton:
+                self._build_morton(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
         else:
+            self._use_morton = False
             self._lat_array = None  # type: ignore[attr-defined]
             self._lon_array = None  # type: ignore[attr-defined]
             self._cos_lat_array = None  # type: ignore[attr-defined]
 
+    def _build_morton(self, lats, lons) -> None:
+        """Sort nodes once by their Z-order key for bbox range queries."""
+
+        assert np is not None  # for mypy
+        self._lat_min = float(lats.min())
+        self._lon_min = float(lons.min())
+        self._lat_max = float(lats.max())
+        self._lon_max = float(lons.max())
+        self._lat_scale = MORTON_MAX / (self._lat_max - self._lat_min) if self._lat_max > self._lat_min else 0.0
+        self._lon_scale = MORTON_MAX / (self._lon_max - self._lon_min) if self._lon_max > self._lon_min else 0.0
+        qlat = ((lats - self._lat_min) * self._lat_scale).astype(np.uint64)
+        qlon = ((lons - self._lon_min) * self._lon_scale).astype(np.uint64)
+        codes = _morton(qlat, qlon)
+        self._morton_order = np.argsort(codes, kind="stable")
+        self._morton_codes = codes[self._morton_order]
+        # 座標も曲線順に詰めて保持し、範囲スライスを連続メモリのビューで読めるようにする
+        self._morton_lats = np.ascontiguousarray(lats[self._morton_order])
+        self._morton_lons = np.ascontiguousarray(lons[self._morton_order])
+
+    def _quantise_lat(self, lat: float) -> int:
+        return int(min(max((lat - self._lat_min) * self._lat_scale, 0.0), MORTON_MAX))
+
+    def _quantise_lon(self, lon: float) -> int:
+        return int(min(max((lon - self._lon_min) * self._lon_scale, 0.0), MORTON_MAX))
+
     @classmethod
     def from_iterable(
         cls,
@@ -92,28 +159,128 @@ class SpatialIndex:
     ) -> "SpatialIndex":
         return cls(list(coords), cell_size=cell_size, max_radius=max_radius, prefer_vectorised=prefer_vectorised)
 
+    @classmethod
+    def from_arrays(
+        cls,
+        node_ids: Sequence[str],
+        lats: Sequence[float],
+        lons: Sequence[float],
+        *,
+        cell_size: float = 0.005,
+        max_radius: int = 4,
+        prefer_vectorised: bool = True,
+    ) -> "SpatialIndex":
+        """Build directly from parallel id/lat/lon sequences (no per-node dicts)."""
+
+        if len(node_ids) == 0:
+            raise ValueError("SpatialIndex requires at least one coordinate")
+        if not len(node_ids) == len(lats) == len(lons):
+            raise ValueError("node_ids, lats and lons must have the same length")
+        index = cls.__new__(cls)
+        index._build([str(node_id) for node_id in node_ids], lats, lons, cell_size, max_radius, prefer_vectorised)
+        return index
+
     # Public API ---------------------------------------------------------
-    def nearest(self, lat: float, lon: float) -> NearestResult:
-        """Return the nearest node for the supplied coordinate."""
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        *,
+        allowed_ids: Optional[AbstractSet[str]] = None,
+    ) -> NearestResult:
+        """Return the nearest node for the supplied coordinate.
+
+        When *allowed_ids* is given, only those node ids are considered.
+        Raises ``ValueError`` if none of them are present in the index.
+        """
+
+        candidates: Optional[List[int]] = None
+        if allowed_ids is not None:
+            candidates = sorted(self._index_of[node_id] for node_id in allowed_ids if node_id in self._index_of)
+            if not candidates:
+                raise ValueError("SpatialIndex has no node among the allowed ids")
+            if len(candidates) == len(self._node_ids):
+                candidates = None
 
         if self._vector_enabled:
-            return self._nearest_vectorised(lat, lon)
+            if candidates is None and self._use_morton:
+                return self._nearest_morton(lat, lon)
+            return self._nearest_vectorised(lat, lon, candidates)
+        if candidates is not None:
+            return self._nearest_linear(lat, lon, candidates)
         return self._nearest_grid(lat, lon)
 
     # Internal helpers ---------------------------------------------------
-    def _nearest_vectorised(self, lat: float, lon: float) -> NearestResult:
+    def _nearest_vectorised(self, lat: float, lon: float, candidates: Optional[Sequence[int]] = None) -> NearestResult:
         assert np is not None  # for mypy
         lat_rad = lat * RAD
         lon_rad = lon * RAD
-        dlat = self._lat_array - lat_rad  # type: ignore[operator]
-        dlon = self._lon_array - lon_rad  # type: ignore[operator]
+        lat_array = self._lat_array
+        lon_array = self._lon_array
+        cos_lat_array = self._cos_lat_array
+        if candidates is not None:
+            subset = np.asarray(candidates, dtype=np.intp)
+            lat_array = lat_array[subset]  # type: ignore[index]
+            lon_array = lon_array[subset]  # type: ignore[index]
+            cos_lat_array = cos_lat_array[subset]  # type: ignore[index]
+        dlat = lat_array - lat_rad  # type: ignore[operator]
+        dlon = lon_array - lon_rad  # type: ignore[operator]
         sin_dlat = np.sin(dlat / 2.0)
         sin_dlon = np.sin(dlon / 2.0)
-        a = sin_dlat * sin_dlat + math.cos(lat_rad) * self._cos_lat_array * sin_dlon * sin_dlon  # type: ignore[operator]
+        a = sin_dlat * sin_dlat + math.cos(lat_rad) * cos_lat_array * sin_dlon * sin_dlon  # type: ignore[operator]
         c = 2.0 * np.arctan2(np.sqrt(a), np.sqrt(np.maximum(0.0, 1.0 - a)))
         distances = EARTH_RADIUS_M * c
-        idx = int(np.argmin(distances))
-        return NearestResult(self._node_ids[idx], float(distances[idx]), idx)
+        pos = int(np.argmin(distances))
+        idx = int(candidates[pos]) if candidates is not None else pos
+        return NearestResult(self._node_ids[idx], float(distances[pos]), idx)
+
+    def _nearest_morton(self, lat: float, lon: float) -> NearestResult:
+        """Nearest node via Z-order range search over an expanding bbox.
+
+        Nodes whose key lies in ``[z(min corner), z(max corner)]`` are a superset
+        of those inside the bbox; they are masked to the bbox and scanned with
+        vectorised haversine. The hit is exact once it is no farther than the
+        bbox edge, otherwise the bbox doubles.
+        """
+
+        assert np is not None  # for mypy
+        half = self._cell_size
+        cos_lat = math.cos(lat * RAD)
+        while True:
+            lat_lo, lat_hi = lat - half, lat + half
+            lon_lo, lon_hi = lon - half, lon + half
+            covers_all = (
+                lat_lo <= self._lat_min and lat_hi >= self._lat_max and lon_lo <= self._lon_min and lon_hi >= self._lon_max
+            )
+            if covers_all:
+                return self._nearest_vectorised(lat, lon)
+
+            z_lo = _morton(self._quantise_lat(lat_lo), self._quantise_lon(lon_lo))
+            z_hi = _morton(self._quantise_lat(lat_hi), self._quantise_lon(lon_hi))
+            start = int(np.searchsorted(self._morton_codes, np.uint64(z_lo), side="left"))
+            stop = int(np.searchsorted(self._morton_codes, np.uint64(z_hi), side="right"))
+            if stop > start:
+                sub_lats = self._morton_lats[start:stop]
+                sub_lons = self._morton_lons[start:stop]
+                inside = (sub_lats >= lat_lo) & (sub_lats <= lat_hi) & (sub_lons >= lon_lo) & (sub_lons <= lon_hi)
+                if inside.any():
+                    result = self._nearest_vectorised(lat, lon, self._morton_order[start:stop][inside])
+                    # bbox 外の点までの最短距離（緯線方向 / 経線方向の小さい方）
+                    half_rad = half * RAD
+                    edge_m = EARTH_RADIUS_M * min(half_rad, math.asin(min(1.0, cos_lat * math.sin(min(half_rad, math.pi / 2)))))
+                    if result.distance_m <= edge_m:
+                        return result
+            half *= 2.0
+
+    def _nearest_linear(self, lat: float, lon: float, candidates: Sequence[int]) -> NearestResult:
+        best_idx = candidates[0]
+        best_distance = float("inf")
+        for idx in candidates:
+            distance = _haversine(lat, lon, self._lats[idx], self._lons[idx])
+            if distance < best_distance:
+                best_distance = distance
+                best_idx = idx
+        return NearestResult(self._node_ids[best_idx], best_distance, best_idx)
 
     def _nearest_grid(self, lat: float, lon: float) -> NearestResult:
         key = self._cell_key(lat, lon)
@@ -0,0 +1,104 @@
+import pytest
+
+from src.services.cost_calculator import CostCalculator, _half_up_int
+from src.services.master_repository import VehicleCandidate
+from src.services.vehicle_catalog import VehicleType
+
+
+def _vehicle(per_km_cost: float = 0.0, fixed_cost: float = 0.0) -> VehicleType:
+    return VehicleType(name="test", capacity_kg=1000, fixed_cost=fixed_cost, per_km_cost=per_km_cost)
+
+
+def _candidate(**overrides) -> VehicleCandidate:
+    values = dict(
+        name="test",
+        capacity_kg=1000.0,
+        load_volume_m3=None,
+        fuel_type=None,
+        license=None,
+        fuel_efficiency_km_per_l=None,
+        annual_distance_km=None,
+        variable_cost_per_km=0.0,
+        fixed_cost_per_km=0.0,
+        annual_fixed_cost=0.0,
+        variable_cost_breakdown={},
+        fixed_cost_breakdown={},
+        remarks=None,
+        hourly_wage=0.0,
+        average_speed_km_per_h=0.0,
+        loading_time_per_kg=0.0,
+    )
+    values.update(overrides)
+    return VehicleCandidate(**values)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(0.5, 1), (2.5, 3), (1234.5, 1235), (2.675 * 100, 268), (0.49999, 0), (-2.5, -3)],
+)
+def test_half_up_int_rounds_exact_halves_away_from_zero(value, expected):
+    assert _half_up_int(value) == expected
+
+
+def test_distance_cost_rounds_exact_half_up_without_metadata():
+    # 25 円/km x 0.5 km = 12.5 円
+    components = CostCalculator().evaluate(_vehicle(per_km_cost=25), 500)
+    assert components.distance_cost == 13
+
+
+def test_driver_cost_rounds_exact_half_up():
+    # 3000 円/h x (0.005 km / 30 km/h) = 0.5 円（時間が割り切れなくても .5 として扱う）
+    metadata = _candidate(hourly_wage=3000.0, average_speed_km_per_h=30.0)
+    components = CostCalculator().evaluate(_vehicle(), 5, metadata)
+    assert components.details["変動費_運転手人件費"] == 1
+
+
+def test_fixed_cost_item_rounds_exact_half_up():
+    # 7 万円/年 ÷ 10000 km = 7 円/km、0.5 km で 3.5 円
+    metadata = _candidate(annual_distance_km=10000.0, fixed_cost_breakdown={"自賠責保険_万円_per_年": 7.0})
+    components = CostCalculator().evaluate(_vehicle(), 500, metadata)
+    assert components.details["固定費_自賠責保険_万円_per_年"] == 4
+    assert components.fixed_cost == 4
+
+
+@pytest.mark.parametrize(
+    ("manyen", "distance_m", "expected"),
+    [
+        # 年額 x 距離 ÷ 年間距離 が .5 のわずか手前になるケース（km 単価を先に求めると 1 円ずれる）
+        (12.142857142857142, 80850.0, 280),
+        (12.142857142857142, 2450.0, 8),
+        (10.714285714285714, 12250.0, 37),
+        (10.714285714285714, 61250.0, 187),
+    ],
+)
+def test_fixed_cost_item_matches_decimal_apportionment(manyen, distance_m, expected):
+    metadata = _candidate(annual_distance_km=35000.0, fixed_cost_breakdown={"任意保険_万円_per_年": manyen})
+    components = CostCalculator().evaluate(_vehicle(), distance_m, metadata)
+    assert components.details["固定費_任意保険_万円_per_年"] == expected
+
+
+def test_cost_breakdown_sums_match_totals():
+    metadata = _candidate(
+        annual_distance_km=35000.0,
+        fixed_cost_breakdown={"任意保険_万円_per_年": 10.714285714285714, "自賠責保険_万円_per_年": 2.5},
+        variable_cost_breakdown={"燃料費_円_per_km": 17.3, "損料_円_per_km": 4.25},
+        hourly_wage=3000.0,
+        average_speed_km_per_h=30.0,
+        loading_time_per_kg=2.0,
+    )
+    components = CostCalculator().evaluate(_vehicle(fixed_cost=1000), 12345.0, metadata, total_demand_kg=250)
+    fixed_items = [v for k, v in components.details.items() if k.startswith("固定費_")]
+    variable_items = [
+        v for k, v in components.details.items() if k.startswith("変動費_") and not k.endswith("_円_per_kg")
+    ]
+    assert components.fixed_cost == sum(fixed_items)
+    assert components.distance_cost == sum(variable_items)
+    assert components.total_cost == components.fixed_cost + components.distance_cost
+
+
+def test_non_finite_variable_item_is_skipped():
+    metadata = _candidate(variable_cost_breakdown={"燃料費_円_per_km": float("nan"), "損料_円_per_km": 4.0})
+    components = CostCalculator().evaluate(_vehicle(), 2000.0, metadata)
+    assert "変動費_燃料費_円_per_km" not in components.details
+    assert components.details["変動費_損料_円_per_km"] == 8
+    assert components.distance_cost == 8
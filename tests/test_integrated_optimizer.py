@@ -0,0 +1,36 @@
+from dataclasses import replace
+
+import pytest
+
+from src.services.integrated_optimizer import solve_integrated_routing
+from src.services.vehicle_catalog import VehicleType
+
+pytest.importorskip("ortools")
+
+
+def test_stage_b_merge_is_not_pruned_by_connector_offsets(simple_graph_dm):
+    # 回収地点の接続距離が大きくても、OR-Tools の経路距離は行列値のみで測られる。
+    # 下界に接続距離を含めると、km 単価は高いが固定費の無い車種のマージが誤って枝刈りされる
+    distance_matrix = replace(
+        simple_graph_dm,
+        connector_offsets={"depot": 0.0, "sink": 0.0, "pickup1": 200_000.0, "pickup2": 200_000.0},
+    )
+    low_rate = VehicleType(name="low_rate", capacity_kg=1000, fixed_cost=5000, per_km_cost=10)
+    no_fixed = VehicleType(name="no_fixed", capacity_kg=1000, fixed_cost=0, per_km_cost=20)
+    pickups = [
+        {"id": "pickup1", "qty": 600, "kind": ""},
+        {"id": "pickup2", "qty": 600, "kind": ""},
+    ]
+
+    result = solve_integrated_routing(
+        distance_matrix,
+        "depot",
+        "sink",
+        pickups,
+        [low_rate, no_fixed],
+        max_physical_vehicles=1,
+        max_trips=2,
+    )
+
+    assert result.trip_count == 2
+    assert [route.vehicle.name for route in result.fleet.routes] == ["no_fixed"]